@@ -0,0 +1,215 @@
+"""
+Pre-aggregated visitor analytics.
+
+New VisitorLog rows are folded incrementally into hourly and daily rollups
+(hits per path, unique IPs, top user agents). /api/analytics only reads the
+rollup tables, so its cost depends on the requested range and never on the
+size of the raw log.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+
+GRANULARITIES = ('hour', 'day')
+BUCKET_SIZES = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+
+
+def bucket_start(timestamp, granularity):
+    """Truncate a timestamp to the start of its hour or day bucket"""
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class AnalyticsRollups:
+    """Maintain and query the hourly/daily VisitorLog rollups"""
+
+    def __init__(self, app=None, db=None, log_model=None, rollup_model=None,
+                 visitor_model=None, cursor_model=None):
+        self.batch_size = 5000
+        self.max_buckets = 744
+        if app is not None:
+            self.init_app(app, db, log_model, rollup_model, visitor_model, cursor_model)
+
+    def init_app(self, app, db, log_model, rollup_model, visitor_model, cursor_model):
+        self.app = app
+        self.db = db
+        self.log_model = log_model
+        self.rollup_model = rollup_model
+        self.visitor_model = visitor_model
+        self.cursor_model = cursor_model
+        self.batch_size = app.config.get('ANALYTICS_ROLLUP_BATCH_SIZE', self.batch_size)
+        self.max_buckets = app.config.get('ANALYTICS_MAX_BUCKETS', self.max_buckets)
+        app.extensions['analytics_rollups'] = self
+
+    # --- Building ---
+    def update(self, max_batches=None):
+        """Fold VisitorLog rows newer than the cursor into the rollups"""
+        processed = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self._process_batch()
+            if not count:
+                break
+            processed += count
+            batches += 1
+        return processed
+
+    def _process_batch(self):
+        session = self.db.session
+        log = self.log_model
+        cursor = session.get(self.cursor_model, 1)
+        last_id = cursor.last_log_id if cursor else 0
+
+        rows = session.execute(
+            select(log.id, log.ip, log.user_agent, log.path, log.timestamp)
+            .where(log.id > last_id)
+            .order_by(log.id)
+            .limit(self.batch_size)
+        ).all()
+        if not rows:
+            return 0
+
+        hits = Counter()
+        visitors = set()
+        for row in rows:
+            if row.timestamp is None:
+                continue
+            for granularity in GRANULARITIES:
+                bucket = bucket_start(row.timestamp, granularity)
+                hits[(granularity, bucket, 'total', '')] += 1
+                hits[(granularity, bucket, 'path', (row.path or '')[:250])] += 1
+                hits[(granularity, bucket, 'user_agent', (row.user_agent or '')[:250])] += 1
+                if row.ip:
+                    visitors.add((granularity, bucket, row.ip))
+
+        try:
+            # Advance the cursor first; if another worker got there before
+            # us the compare-and-swap fails and the batch is skipped.
+            if cursor is None:
+                session.add(self.cursor_model(id=1, last_log_id=rows[-1].id))
+                session.flush()
+            else:
+                result = session.execute(
+                    update(self.cursor_model)
+                    .where(self.cursor_model.id == 1, self.cursor_model.last_log_id == last_id)
+                    .values(last_log_id=rows[-1].id)
+                )
+                if result.rowcount != 1:
+                    session.rollback()
+                    return 0
+
+            self._add_hits(hits)
+            self._add_visitors(visitors)
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return 0
+        except Exception:
+            session.rollback()
+            raise
+        return len(rows)
+
+    def _add_hits(self, hits):
+        if not hits:
+            return
+        table = self.rollup_model.__table__
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['granularity', 'bucket_start', 'dimension', 'value'],
+            set_={'hits': table.c.hits + stmt.excluded.hits}
+        )
+        self.db.session.execute(stmt, [
+            {'granularity': g, 'bucket_start': b, 'dimension': d, 'value': v, 'hits': n}
+            for (g, b, d, v), n in hits.items()
+        ])
+
+    def _add_visitors(self, visitors):
+        if not visitors:
+            return
+        session = self.db.session
+        visitor_table = self.visitor_model.__table__
+        session.execute(
+            sqlite_insert(visitor_table).on_conflict_do_nothing(),
+            [{'granularity': g, 'bucket_start': b, 'ip': ip} for g, b, ip in visitors]
+        )
+
+        # Refresh the distinct count of every bucket this batch touched
+        touched = {(g, b) for g, b, _ in visitors}
+        counts = []
+        for granularity, bucket in touched:
+            count = session.execute(
+                select(func.count())
+                .select_from(visitor_table)
+                .where(visitor_table.c.granularity == granularity,
+                       visitor_table.c.bucket_start == bucket)
+            ).scalar()
+            counts.append({'granularity': granularity, 'bucket_start': bucket,
+                           'dimension': 'unique_ips', 'value': '', 'hits': count})
+
+        table = self.rollup_model.__table__
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['granularity', 'bucket_start', 'dimension', 'value'],
+            set_={'hits': stmt.excluded.hits}
+        )
+        session.execute(stmt, counts)
+
+    # --- Querying ---
+    def bucket_count(self, start, end, granularity):
+        return int((end - start) / BUCKET_SIZES[granularity]) + 1
+
+    def query(self, start, end, granularity='day', top=10):
+        """Return the visitor series and top paths/user agents for a range"""
+        rollup = self.rollup_model
+        start = bucket_start(start, granularity)
+        in_range = (
+            (rollup.granularity == granularity)
+            & (rollup.bucket_start >= start)
+            & (rollup.bucket_start <= end)
+        )
+
+        series = {}
+        rows = self.db.session.execute(
+            select(rollup.bucket_start, rollup.dimension, rollup.hits)
+            .where(in_range, rollup.dimension.in_(('total', 'unique_ips')))
+            .order_by(rollup.bucket_start)
+        ).all()
+        for row in rows:
+            point = series.setdefault(row.bucket_start, {'page_views': 0, 'unique_visitors': 0})
+            if row.dimension == 'total':
+                point['page_views'] = row.hits
+            else:
+                point['unique_visitors'] = row.hits
+
+        return {
+            'granularity': granularity,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'visitors': [
+                {'date': bucket.isoformat(), **point}
+                for bucket, point in series.items()
+            ],
+            'top_paths': [
+                {'path': value, 'hits': total}
+                for value, total in self._top(in_range, 'path', top)
+            ],
+            'top_user_agents': [
+                {'user_agent': value, 'hits': total}
+                for value, total in self._top(in_range, 'user_agent', top)
+            ],
+        }
+
+    def _top(self, in_range, dimension, limit):
+        rollup = self.rollup_model
+        total = func.sum(rollup.hits).label('total')
+        return self.db.session.execute(
+            select(rollup.value, total)
+            .where(in_range, rollup.dimension == dimension)
+            .group_by(rollup.value)
+            .order_by(total.desc())
+            .limit(limit)
+        ).all()
@@ -1,22 +1,46 @@
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, session, abort
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, abort, get_template_attribute
 from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
+from flask_mail import Mail
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from functools import wraps
 import os
-import requests
 import json
 from collections import defaultdict
 import secrets
 import re
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+import rate_limit_storage  # registers the sqlite:// rate limit storage
 from flask_wtf.csrf import CSRFProtect
 from flask_talisman import Talisman
-from sqlalchemy import func
+from sqlalchemy import func, inspect, select
+from sqlalchemy.orm import load_only
+import click
+from visitor_logging import VisitorLogBuffer
+from analytics import AnalyticsRollups, GRANULARITIES
+from retention import VisitorLogRetention
+from github_stats import GitHubFetcher, GitHubStatsRefresher
+from search import SearchIndex
+from tags import TagIndex
+from related import RelatedPosts
+from view_counts import ViewCounter
+from page_cache import PageCache
+from conditional import ContentVersions
+from mail_outbox import MailOutbox
+from db_engine import configure_database, RoutingSession, SQLiteTuning
+from migrations import SchemaMigrations, create_indexes
+from query_plans import QueryPlanChecker
+from keyset import KeysetPaginator, InvalidCursor
+from exports import StreamingExport, FORMATS as EXPORT_FORMATS
+from assets import AssetManifest
+from images import ResponsiveImages
+from storage import ContentStore
+from bulk import BulkData, BulkDataset, BulkError, boolean, choice, slugify, unique_slugs
+from triage import InquiryTriage, ACTIONS as TRIAGE_ACTIONS, PRIORITIES
 
 load_dotenv()
+from config import config as config_classes  # after load_dotenv; only the SQLITE_* tuning is read from it
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(32))
@@ -25,6 +49,11 @@ app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(32))
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'txt', 'doc', 'docx'}
+# /api/upload files are stored by content hash here (default: instance/files)
+app.config['STORAGE_FOLDER'] = os.getenv('STORAGE_FOLDER')
+# nginx internal location mapped to STORAGE_FOLDER/blobs; unset = the app sends files itself
+app.config['STORAGE_ACCEL_PREFIX'] = os.getenv('STORAGE_ACCEL_PREFIX')
+app.config['STORAGE_MAX_AGE'] = 3600  # seconds, for files that can change (the resume)
 
 # Security configurations
 app.config['WTF_CSRF_TIME_LIMIT'] = 3600
@@ -49,25 +78,101 @@ talisman = Talisman(
     }
 )
 
-# Rate limiting with proper storage
+# Rate limiting; counters live in a SQLite file so all workers share them
+app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'  # off for benchmarks
+app.config['RATELIMIT_STORAGE_URI'] = os.getenv(
+    'RATELIMIT_STORAGE_URI', f"sqlite:///{os.path.join(app.instance_path, 'rate_limits.db')}"
+)
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    storage_uri=app.config['RATELIMIT_STORAGE_URI']
 )
 limiter.init_app(app)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///portfolio.db'
+# Full-page cache for anonymous visitors: lru (per worker), sqlite, redis or null
+app.config['CACHE_TYPE'] = os.getenv('CACHE_TYPE', 'lru')
+app.config['CACHE_DEFAULT_TIMEOUT'] = 300  # seconds
+app.config['CACHE_LRU_MAX_ENTRIES'] = 512
+app.config['CACHE_SQLITE_PATH'] = os.getenv('CACHE_SQLITE_PATH')  # default: instance/page_cache.db
+app.config['CACHE_REDIS_HOST'] = os.getenv('REDIS_HOST', 'localhost')
+app.config['CACHE_REDIS_PORT'] = int(os.getenv('REDIS_PORT', 6379))
+page_cache = PageCache(app)
+
+# Database settings come from the Config class named by FLASK_ENV (see db_engine.py)
+configure_database(app, config_classes.get(os.getenv('FLASK_ENV', 'default'), config_classes['default']))
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
-
-app.config['MAIL_SERVER'] = 'smtp.gmail.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+sqlite_tuning = SQLiteTuning(app, db)
+
+# Visitor logging is write-behind: entries are queued and bulk inserted
+app.config['VISITOR_LOG_QUEUE_SIZE'] = int(os.getenv('VISITOR_LOG_QUEUE_SIZE', 10000))
+app.config['VISITOR_LOG_BATCH_SIZE'] = int(os.getenv('VISITOR_LOG_BATCH_SIZE', 200))
+app.config['VISITOR_LOG_FLUSH_INTERVAL'] = float(os.getenv('VISITOR_LOG_FLUSH_INTERVAL', 5))
+
+# Analytics rollups
+app.config['ANALYTICS_ENABLED'] = True
+app.config['ANALYTICS_ROLLUP_BATCH_SIZE'] = 5000
+app.config['ANALYTICS_MAX_BUCKETS'] = 744  # 31 days of hourly buckets
+
+# Visitor data retention
+app.config['ANALYTICS_RETENTION_DAYS'] = int(os.getenv('ANALYTICS_RETENTION_DAYS', 90))
+app.config['ANALYTICS_RETENTION_BATCH_SIZE'] = 1000
+app.config['ANALYTICS_RETENTION_INTERVAL'] = 3600  # seconds between automatic passes
+app.config['ANALYTICS_ARCHIVE_FOLDER'] = os.getenv('ANALYTICS_ARCHIVE_FOLDER')  # unset = delete only
+
+# GitHub stats are served stale and refreshed in the background
+app.config['GITHUB_STATS_MAX_AGE'] = 3600  # seconds
+app.config['GITHUB_STATS_RETRY_INTERVAL'] = 300  # seconds between attempts per worker
+app.config['GITHUB_USERNAME'] = os.getenv('GITHUB_USERNAME', 'vishaldeshmukh2k6')
+app.config['GITHUB_TOKEN'] = os.getenv('GITHUB_TOKEN')  # Optional, raises the API rate limit
+app.config['GITHUB_API_URL'] = os.getenv('GITHUB_API_URL', 'https://api.github.com')
+app.config['GITHUB_FETCH_CONCURRENCY'] = 4
+
+# Blog
+app.config['RELATED_POSTS_COUNT'] = 5  # neighbours precomputed per post
+app.config['VIEW_COUNT_FLUSH_INTERVAL'] = 10  # seconds between view counter write-backs
+
+# Contact triage: an inquiry is spam once its matched spam rules weigh this much
+app.config['TRIAGE_SPAM_THRESHOLD'] = 1
+
+app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
+app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'true').lower() == 'true'
 app.config['MAIL_USERNAME'] = os.getenv("MAIL_USERNAME")
 app.config['MAIL_PASSWORD'] = os.getenv("MAIL_PASSWORD")
 mail = Mail(app)
 
+# Outgoing mail is queued in the database and sent by a background thread
+app.config['MAIL_OUTBOX_POLL_INTERVAL'] = 30  # seconds between sender passes
+app.config['MAIL_OUTBOX_BATCH_SIZE'] = 20
+app.config['MAIL_OUTBOX_MAX_ATTEMPTS'] = 8
+app.config['MAIL_OUTBOX_BACKOFF'] = 30  # seconds, doubled per failed attempt
+app.config['MAIL_OUTBOX_MAX_BACKOFF'] = 3600
+app.config['MAIL_OUTBOX_KEEP_SENT_DAYS'] = 7  # sent messages are deleted after this
+
+# Admin dashboard panels are fetched page by page
+app.config['ADMIN_PANEL_PAGE_SIZE'] = 20
+
+# Cursor pagination totals are recounted at most this often
+app.config['KEYSET_COUNT_TTL'] = 60  # seconds
+
+# Streaming exports fetch and send this many rows at a time
+app.config['EXPORT_BATCH_SIZE'] = 1000
+
+# Static URLs resolve to content-hashed copies built by 'flask build-assets'
+app.config['ASSETS_USE_MANIFEST'] = os.getenv('ASSETS_USE_MANIFEST', 'true').lower() == 'true'
+app.config['ASSETS_DIST_DIR'] = 'dist'  # under the static folder
+app.config['ASSETS_EXCLUDE'] = ['uploads', 'variants']  # static subfolders that are not build inputs
+
+# Responsive images: WebP/JPEG variants per width, built by 'flask build-images'
+app.config['IMAGE_WIDTHS'] = (320, 640, 960, 1280)
+app.config['IMAGE_QUALITY'] = 80
+app.config['IMAGE_VARIANTS_DIR'] = 'variants'  # under the static folder
+
+# Bulk import rows per dataset, and ids per batch update or delete
+app.config['BULK_MAX_ROWS'] = 5000
+
 #  Models
 class Project(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -76,6 +181,9 @@ class Project(db.Model):
     github_link = db.Column(db.String(250))
     live_link = db.Column(db.String(250))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_project_created_at', 'created_at'),
+    )
 
 class VisitorLog(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -83,12 +191,18 @@ class VisitorLog(db.Model):
     user_agent = db.Column(db.String(250))
     path = db.Column(db.String(100))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_visitor_log_timestamp', 'timestamp'),
+    )
 
 class ProductMessage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     product = db.Column(db.String(255), nullable=False)
     message = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_product_message_created_at', 'created_at'),
+    )
 
 class Certificate(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -108,6 +222,9 @@ class Skill(db.Model):
     proficiency = db.Column(db.Integer, nullable=False)  # 1-100
     years_experience = db.Column(db.Float, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_skill_proficiency', 'proficiency'),
+    )
 
 class BlogPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -122,6 +239,43 @@ class BlogPost(db.Model):
     views = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    __table_args__ = (
+        # Published listings newest first, the home page's featured posts, the admin list
+        db.Index('ix_blog_post_published_created', 'published', 'created_at'),
+        db.Index('ix_blog_post_featured', 'published', 'featured', 'created_at'),
+        db.Index('ix_blog_post_created_at', 'created_at'),
+    )
+
+class Tag(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50, collation='NOCASE'), nullable=False, unique=True)
+    post_count = db.Column(db.Integer, nullable=False, default=0)  # published posts only
+
+blog_post_tag = db.Table(
+    'blog_post_tag',
+    db.Column('post_id', db.Integer, db.ForeignKey('blog_post.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_blog_post_tag_tag_id', 'tag_id', 'post_id'),
+)
+
+class RelatedPost(db.Model):
+    # Precomputed top-N similar posts per post
+    post_id = db.Column(db.Integer, db.ForeignKey('blog_post.id', ondelete='CASCADE'), primary_key=True)
+    related_id = db.Column(db.Integer, db.ForeignKey('blog_post.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    __table_args__ = (
+        db.Index('ix_related_post_lookup', 'post_id', 'score'),
+        db.Index('ix_related_post_related_id', 'related_id'),
+    )
+
+# Content-term weights per published post (inverted index for similarity)
+post_term = db.Table(
+    'post_term',
+    db.Column('post_id', db.Integer, db.ForeignKey('blog_post.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('term', db.String(50), primary_key=True),
+    db.Column('weight', db.Float, nullable=False),
+    db.Index('ix_post_term_term', 'term', 'post_id'),
+)
 
 class CodeSnippet(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -132,6 +286,12 @@ class CodeSnippet(db.Model):
     tags = db.Column(db.String(500))
     featured = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        # The language index also serves the list of distinct languages
+        db.Index('ix_code_snippet_language', 'language', 'created_at'),
+        db.Index('ix_code_snippet_featured', 'featured', 'created_at'),
+        db.Index('ix_code_snippet_created_at', 'created_at'),
+    )
 
 class ContactInquiry(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -141,10 +301,44 @@ class ContactInquiry(db.Model):
     message = db.Column(db.Text, nullable=False)
     category = db.Column(db.String(50), default='general')  # general, project, job, collaboration
     priority = db.Column(db.String(20), default='normal')  # low, normal, high
-    status = db.Column(db.String(20), default='new')  # new, read, replied, closed
+    status = db.Column(db.String(20), default='new')  # new, read, replied, closed, spam
+    # Status, priority and category are still as triage set them; cleared once an admin changes any
+    triaged = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
     ip_address = db.Column(db.String(50))
     user_agent = db.Column(db.String(500))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        # Unread / high-priority counts and the newest-first inbox
+        db.Index('ix_contact_inquiry_status', 'status', 'priority', 'created_at'),
+        db.Index('ix_contact_inquiry_created_at', 'created_at'),
+    )
+
+class TriageRule(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    pattern = db.Column(db.String(100), nullable=False)  # phrase, matched case-insensitively
+    action = db.Column(db.String(20), nullable=False)  # spam, priority, category
+    value = db.Column(db.String(50), nullable=False, default='')  # priority or category name
+    weight = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_triage_rule_action', 'action', 'pattern'),
+    )
+
+class OutboxMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(300), nullable=False)
+    sender = db.Column(db.String(120))
+    recipients = db.Column(db.String(500), nullable=False)  # Comma-separated
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    __table_args__ = (
+        db.Index('ix_outbox_message_due', 'status', 'next_attempt_at'),
+    )
 
 class GitHubStats(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -157,20 +351,104 @@ class GitHubStats(db.Model):
     most_used_language = db.Column(db.String(50))
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
 
+class AnalyticsRollup(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    dimension = db.Column(db.String(20), nullable=False)  # total, unique_ips, path, user_agent
+    value = db.Column(db.String(250), nullable=False, default='')
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'dimension', 'value', name='uq_analytics_rollup_key'),
+        db.Index('ix_analytics_rollup_range', 'granularity', 'dimension', 'bucket_start'),
+    )
+
+class AnalyticsVisitor(db.Model):
+    # Distinct IPs seen per bucket, used to keep unique_ips counts exact
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    ip = db.Column(db.String(50), nullable=False)
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'bucket_start', 'ip', name='uq_analytics_visitor_key'),
+        db.Index('ix_analytics_visitor_bucket_start', 'bucket_start'),  # retention pruning
+    )
+
+class StoredFile(db.Model):
+    # An upload; the bytes live in the content store under sha256
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    public = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        db.Index('ix_stored_file_sha256', 'sha256', 'filename'),  # duplicate uploads
+    )
+
+class AnalyticsCursor(db.Model):
+    # Single row: id of the last VisitorLog folded into the rollups
+    id = db.Column(db.Integer, primary_key=True)
+    last_log_id = db.Column(db.Integer, nullable=False, default=0)
+
+visitor_log_buffer = VisitorLogBuffer(app, db, VisitorLog)
+analytics_rollups = AnalyticsRollups(app, db, VisitorLog, AnalyticsRollup, AnalyticsVisitor, AnalyticsCursor)
+visitor_log_retention = VisitorLogRetention(
+    app, db, VisitorLog,
+    extra_targets=[(AnalyticsVisitor, AnalyticsVisitor.bucket_start)]
+)
+
+search_index = SearchIndex(app, db)
+tag_index = TagIndex(app, db, BlogPost, Tag, blog_post_tag)
+related_posts = RelatedPosts(app, db, BlogPost, RelatedPost, post_term, blog_post_tag)
+view_counter = ViewCounter(app, db, BlogPost)
+mail_outbox = MailOutbox(app, db, mail, OutboxMessage)
+# View counts do not change what conditional GETs validate
+content_versions = ContentVersions(app, db, ignore={'blog_post': ('views', 'updated_at')})
+inquiry_triage = InquiryTriage(app, db, TriageRule, ContactInquiry, versions=content_versions)
+schema_migrations = SchemaMigrations(app, db)
+
+@schema_migrations.migration('0001_hot_path_indexes')
+def add_hot_path_indexes(conn):
+    # Listing, filtering and sorting indexes for databases created before them
+    create_indexes(conn, Project, VisitorLog, ProductMessage, Skill, BlogPost, CodeSnippet,
+                   ContactInquiry, TriageRule, AnalyticsVisitor)
+
+@schema_migrations.migration('0002_contact_inquiry_triaged')
+def add_contact_inquiry_triaged(conn):
+    # Existing inquiries count as untouched, as they were before the column
+    if 'triaged' not in {column['name'] for column in inspect(conn).get_columns('contact_inquiry')}:
+        conn.exec_driver_sql("ALTER TABLE contact_inquiry ADD COLUMN triaged BOOLEAN NOT NULL DEFAULT 1")
+
+keyset_paginator = KeysetPaginator(app)
+streaming_export = StreamingExport(app, db)
+asset_manifest = AssetManifest(app)
+responsive_images = ResponsiveImages(app)
+# Pages link hashed asset names and srcsets, so a new build must change their ETags
+content_versions.depend_on(asset_manifest.manifest_path, responsive_images.records_folder)
+content_store = ContentStore(app, db, StoredFile, allowed_extensions=ALLOWED_EXTENSIONS)
+query_plan_checker = QueryPlanChecker(app, db, allow_scan=['sqlite_master'])
+
+if app.config['ANALYTICS_ENABLED']:
+    # Keep the rollups current whenever buffered visits reach the database
+    visitor_log_buffer.after_flush(analytics_rollups.update)
+# Retention runs after the rollups so no row is pruned before it is counted
+visitor_log_buffer.after_flush(visitor_log_retention.maybe_run)
+
 @app.before_request
 def before_request():
-    # Visitor logging
+    # Processes that did not come from create_app() (flask run, shells) warm up here
+    if not _warmed_up:
+        warm_up()
+    
+    # Visitor logging (queued, flushed in bulk by a background thread)
     if request.endpoint not in ["static"]:
-        new_log = VisitorLog(
+        visitor_log_buffer.log(
             ip=request.remote_addr,
             user_agent=request.headers.get("User-Agent"),
             path=request.path
         )
-        db.session.add(new_log)
-        try:
-            db.session.commit()
-        except:
-            db.session.rollback()
 
 @app.after_request
 def after_request(response):
@@ -181,7 +459,16 @@ def after_request(response):
     return response
 
 # --- Routes ---
+def refresh_github_stats_if_stale():
+    # Serve the cached stats; refresh in the background if older than 1 hour
+    github_stats_refresher.refresh_if_stale(GitHubStats.query.first())
+
 @app.route("/")
+@content_versions.conditional(
+    Project, Certificate, Skill, BlogPost, CodeSnippet, GitHubStats,
+    private=True, before=refresh_github_stats_if_stale
+)
+@page_cache.cached('home')
 def home():
     projects = Project.query.order_by(Project.created_at.desc()).limit(6).all()
     certificates = Certificate.query.order_by(Certificate.id.desc()).limit(6).all()
@@ -190,11 +477,6 @@ def home():
     code_snippets = CodeSnippet.query.filter_by(featured=True).limit(4).all()
     github_stats = GitHubStats.query.first()
     
-    # Update GitHub stats if older than 1 hour
-    if not github_stats or github_stats.last_updated < datetime.utcnow() - timedelta(hours=1):
-        update_github_stats()
-        github_stats = GitHubStats.query.first()
-    
     return render_template("index.html", 
                          projects=projects, 
                          certificates=certificates,
@@ -226,17 +508,13 @@ def contact():
         flash("Name must be at least 2 characters and message at least 10 characters!", "danger")
         return redirect(url_for("home"))
     
-    # Check for spam patterns
-    spam_keywords = ['viagra', 'casino', 'lottery', 'winner', 'congratulations', 'click here']
-    if any(keyword in message_text.lower() for keyword in spam_keywords):
+    # Spam, priority and category from the triage rules, in one pass
+    triage = inquiry_triage.triage(subject, message_text, category=category)
+    if triage.spam:
         flash("Message appears to be spam and was not sent.", "danger")
         return redirect(url_for("home"))
-    
-    # Determine priority based on keywords
-    priority = "normal"
-    urgent_keywords = ["urgent", "asap", "emergency", "critical", "job", "opportunity"]
-    if any(keyword in message_text.lower() or keyword in subject.lower() for keyword in urgent_keywords):
-        priority = "high"
+    priority = triage.priority
+    category = triage.category
     
     try:
         # Save to database
@@ -252,14 +530,15 @@ def contact():
         )
         db.session.add(inquiry)
         
-        msg = Message(
+        # Queued in the same transaction; the background sender delivers it
+        mail_outbox.enqueue(
             subject=f"[{priority.upper()}] Portfolio Contact: {subject}",
             sender=app.config['MAIL_USERNAME'],
             recipients=[app.config['MAIL_USERNAME']],
             body=f"From: {name}\nEmail: {email}\nCategory: {category}\nPriority: {priority}\n\nMessage:\n{message_text}"
         )
-        mail.send(msg)
         db.session.commit()
+        mail_outbox.wake()
         flash("Message sent successfully! I'll get back to you soon.", "success")
     except Exception as e:
         db.session.rollback()
@@ -270,7 +549,10 @@ def contact():
 
 @app.route("/resume")
 def resume():
-    return send_file("static/resume.pdf", as_attachment=True)
+    response = content_store.send_static("resume.pdf", as_attachment=True)
+    if response is None:
+        abort(404)
+    return response
 
 @app.route("/terms")
 def terms():
@@ -278,13 +560,22 @@ def terms():
 
 @app.route("/health")
 def health():
-    return jsonify({"status": "healthy", "message": "Portfolio app is running"}), 200
+    return jsonify({
+        "status": "healthy",
+        "message": "Portfolio app is running",
+        "visitor_log": visitor_log_buffer.stats(),
+        "retention": visitor_log_retention.stats(),
+        "page_cache": page_cache.stats(),
+        "mail_outbox": mail_outbox.stats()
+    }), 200
 
 
 
 # --- API Endpoints ---
 @app.route("/api/projects")
 @limiter.limit("100 per hour")
+@content_versions.conditional(Project)
+@page_cache.cached('projects')
 def api_projects():
     projects = Project.query.all()
     return jsonify([{
@@ -298,6 +589,8 @@ def api_projects():
 
 @app.route("/api/skills")
 @limiter.limit("100 per hour")
+@content_versions.conditional(Skill)
+@page_cache.cached('skills')
 def api_skills():
     skills = Skill.query.all()
     skills_by_category = defaultdict(list)
@@ -311,6 +604,7 @@ def api_skills():
 
 @app.route("/api/github-stats")
 @limiter.limit("50 per hour")
+@content_versions.conditional(GitHubStats, before=refresh_github_stats_if_stale)
 def api_github_stats():
     stats = GitHubStats.query.first()
     if not stats:
@@ -326,48 +620,140 @@ def api_github_stats():
         "last_updated": stats.last_updated.isoformat()
     })
 
-@app.route("/blog")
-def blog():
-    try:
-        page = max(1, int(request.args.get('page', 1)))
-    except (ValueError, TypeError):
-        page = 1
-    
+@app.route("/api/blog")
+@limiter.limit("100 per hour")
+@content_versions.conditional(BlogPost)
+@page_cache.cached('blog')
+def api_blog():
     search = sanitize_input(request.args.get('search', ''))[:100]
     tag = sanitize_input(request.args.get('tag', ''))[:50]
-    
+    per_page = min(max(request.args.get('per_page', 6, type=int), 1), 20)
+    try:
+        posts = blog_page(search, tag, request.args.get('cursor'), per_page)
+    except InvalidCursor:
+        return jsonify({"error": "Invalid cursor"}), 400
+    return jsonify({
+        "posts": [{
+            "id": p.id,
+            "title": p.title,
+            "slug": p.slug,
+            "excerpt": p.excerpt,
+            "tags": [t.strip() for t in (p.tags or '').split(',') if t.strip()],
+            "read_time": p.read_time,
+            "views": p.views,
+            "created_at": p.created_at.isoformat(),
+            "url": url_for('blog_post', slug=p.slug)
+        } for p in posts.items],
+        "per_page": posts.per_page,
+        "total": posts.total,
+        "next_cursor": posts.next_cursor,
+        "prev_cursor": posts.prev_cursor
+    })
+
+@app.route("/api/search")
+@limiter.limit("50 per hour")
+def api_search():
+    query = sanitize_input(request.args.get('q', ''))[:100]
+    if len(query) < 2:
+        return jsonify({"error": "Query must be at least 2 characters"}), 400
+    if not search_index.available:
+        return jsonify({"error": "Search is unavailable"}), 503
+
+    types = [t.strip() for t in request.args.get('types', '').split(',') if t.strip()] or None
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 50)
+    except (ValueError, TypeError):
+        limit = 20
+
+    matches = search_index.search(query, types=types, limit=limit)
+
+    # One lookup per content type for URLs and dates
+    ids = defaultdict(list)
+    for match in matches:
+        ids[match['type']].append(match['id'])
+    posts = {p.id: p for p in BlogPost.query.filter(BlogPost.id.in_(ids['blog']))} if ids['blog'] else {}
+    snippets = {s.id: s for s in CodeSnippet.query.filter(CodeSnippet.id.in_(ids['snippet']))} if ids['snippet'] else {}
+    projects = {p.id: p for p in Project.query.filter(Project.id.in_(ids['project']))} if ids['project'] else {}
+
+    results = []
+    for match in matches:
+        if match['type'] == 'blog' and match['id'] in posts:
+            item = posts[match['id']]
+            url = url_for('blog_post', slug=item.slug)
+        elif match['type'] == 'snippet' and match['id'] in snippets:
+            item = snippets[match['id']]
+            url = url_for('code_snippets', search=item.title)
+        elif match['type'] == 'project' and match['id'] in projects:
+            item = projects[match['id']]
+            url = item.live_link or item.github_link or url_for('home', _anchor='projects')
+        else:
+            continue
+        results.append({
+            "type": match['type'],
+            "id": match['id'],
+            "title": match['title'],
+            "description": match['excerpt'],
+            "content": match['excerpt'],
+            "url": url,
+            "score": match['score'],
+            "date": item.created_at.isoformat() if item.created_at else None
+        })
+
+    return jsonify({"results": results, "total": len(results), "query": query})
+
+def published_posts(search, tag):
+    """Published posts matching the blog's search and tag filters"""
     query = BlogPost.query.filter_by(published=True)
     
     if search and len(search) >= 2:
-        query = query.filter(BlogPost.title.contains(search) | BlogPost.content.contains(search))
+        if search_index.available:
+            query = query.filter(BlogPost.id.in_(search_index.id_subquery('blog', search)))
+        else:
+            query = query.filter(BlogPost.title.contains(search) | BlogPost.content.contains(search))
     
     if tag:
-        query = query.filter(BlogPost.tags.contains(tag))
+        query = query.filter(BlogPost.id.in_(tag_index.post_ids_subquery(tag)))
+    return query
+
+def blog_page(search, tag, cursor, per_page=6):
+    """One keyset page of the blog listing, newest first; InvalidCursor for a bad cursor"""
+    return keyset_paginator.paginate(
+        published_posts(search, tag), (BlogPost.created_at, BlogPost.id),
+        cursor=cursor, per_page=per_page, count_key=f"blog:{search}:{tag}"
+    )
+
+@app.route("/blog")
+@content_versions.conditional(BlogPost)
+@page_cache.cached('blog')
+def blog():
+    search = sanitize_input(request.args.get('search', ''))[:100]
+    tag = sanitize_input(request.args.get('tag', ''))[:50]
     
     try:
-        posts = query.order_by(BlogPost.created_at.desc()).paginate(
-            page=page, per_page=6, error_out=False, max_per_page=20
-        )
-    except Exception as e:
-        app.logger.error(f"Blog pagination error: {e}")
-        posts = query.order_by(BlogPost.created_at.desc()).paginate(
-            page=1, per_page=6, error_out=False
-        )
+        posts = blog_page(search, tag, request.args.get('cursor'))
+    except InvalidCursor:
+        posts = blog_page(search, tag, None)
     
-    # Get all tags for filter
-    all_tags = set()
+    # Get all tags for filter (from the tag index, not the posts)
+    all_tags = []
     try:
-        all_posts = BlogPost.query.filter_by(published=True).all()
-        for post in all_posts:
-            if post.tags:
-                tags = [sanitize_input(tag.strip()) for tag in post.tags.split(',')]
-                all_tags.update([tag for tag in tags if tag])
+        all_tags = [sanitize_input(name) for name, count in tag_index.tag_cloud()]
     except Exception as e:
         app.logger.error(f"Error getting tags: {e}")
     
-    return render_template('blog.html', posts=posts, all_tags=sorted(all_tags), current_search=search, current_tag=tag)
+    return render_template('blog.html', posts=posts, all_tags=all_tags, current_search=search, current_tag=tag)
+
+def count_blog_view(slug):
+    # Runs for every article hit: rendered, served from cache or answered 304
+    slug = re.sub(r'[^a-zA-Z0-9-]', '', slug)
+    post_id = db.session.query(BlogPost.id).filter_by(slug=slug, published=True).scalar() if slug else None
+    if post_id is not None:
+        # Count the view in memory; it is written back in batches
+        view_counter.increment(post_id)
 
 @app.route("/blog/<slug>")
+@content_versions.conditional(BlogPost, before=count_blog_view)
+@page_cache.cached(lambda slug: f'post:{slug}')
 def blog_post(slug):
     # Sanitize slug to prevent path traversal
     slug = re.sub(r'[^a-zA-Z0-9-]', '', slug)
@@ -375,34 +761,28 @@ def blog_post(slug):
         abort(404)
     
     post = BlogPost.query.filter_by(slug=slug, published=True).first_or_404()
-    
-    try:
-        # Increment view count
-        post.views += 1
-        db.session.commit()
-    except Exception as e:
-        app.logger.error(f"Error updating view count: {e}")
-        db.session.rollback()
-    
-    # Get related posts
-    related_posts = []
-    if post.tags:
-        tags = [sanitize_input(tag.strip()) for tag in post.tags.split(',')]
-        for tag in tags[:2]:  # Use first 2 tags
-            if tag:  # Only process non-empty tags
-                related = BlogPost.query.filter(
-                    BlogPost.tags.contains(tag),
-                    BlogPost.id != post.id,
-                    BlogPost.published == True
-                ).limit(3).all()
-                related_posts.extend(related)
-    
-    # Remove duplicates and limit
-    related_posts = list({p.id: p for p in related_posts}.values())[:3]
-    
-    return render_template('blog_post.html', post=post, related_posts=related_posts)
+
+    # Get related posts (precomputed from tags and content terms)
+    related = related_posts.for_post(post.id, limit=3)
+
+    # The view count is not rendered here: this page is cached, the page fetches it from blog_post_views
+    return render_template('blog_post.html', post=post, related_posts=related)
+
+@app.route("/blog/<slug>/views")
+@limiter.exempt  # every article page fetches it
+def blog_post_views(slug):
+    slug = re.sub(r'[^a-zA-Z0-9-]', '', slug)
+    row = db.session.query(BlogPost.id, BlogPost.views).filter_by(slug=slug, published=True).first() if slug else None
+    if row is None:
+        abort(404)
+    # Never cached, and includes the views this worker has not written back yet
+    response = jsonify({"views": (row.views or 0) + view_counter.pending(row.id)})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 @app.route("/code-snippets")
+@content_versions.conditional(CodeSnippet)
+@page_cache.cached('snippets')
 def code_snippets():
     language = sanitize_input(request.args.get('language', ''))[:50]
     search = sanitize_input(request.args.get('search', ''))[:100]
@@ -413,7 +793,10 @@ def code_snippets():
         query = query.filter_by(language=language)
     
     if search and len(search) >= 2:
-        query = query.filter(CodeSnippet.title.contains(search) | CodeSnippet.description.contains(search))
+        if search_index.available:
+            query = query.filter(CodeSnippet.id.in_(search_index.id_subquery('snippet', search)))
+        else:
+            query = query.filter(CodeSnippet.title.contains(search) | CodeSnippet.description.contains(search))
     
     try:
         snippets = query.order_by(CodeSnippet.created_at.desc()).all()
@@ -438,7 +821,9 @@ def admin_required(f):
             return redirect(url_for("login"))
         # Check session timeout
         if session.get('last_activity'):
-            if datetime.utcnow() - session['last_activity'] > timedelta(hours=1):
+            # The session serializer hands datetimes back timezone-aware (UTC)
+            last_activity = session['last_activity'].replace(tzinfo=None)
+            if datetime.utcnow() - last_activity > timedelta(hours=1):
                 session.clear()
                 flash("Session expired. Please login again.", "warning")
                 return redirect(url_for("login"))
@@ -463,49 +848,329 @@ def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# --- Content validation ---
+# Shared by the admin forms and bulk import: each takes a dict of submitted
+# values and returns model columns, or raises ValueError with the message shown
+URL_PATTERN = r'^https?://[\w\.-]+\.[a-zA-Z]{2,}'
+
+def clean_project(data):
+    title = sanitize_input(data.get("title"))
+    description = sanitize_input(data.get("description"))
+    github_link = sanitize_input(data.get("github_link"))
+    live_link = sanitize_input(data.get("live_link"))
+    if not title or not description:
+        raise ValueError("Title and description are required!")
+    if github_link and not re.match(URL_PATTERN, github_link):
+        raise ValueError("Invalid GitHub URL format!")
+    if live_link and not re.match(URL_PATTERN, live_link):
+        raise ValueError("Invalid live URL format!")
+    return dict(title=title, description=description, github_link=github_link, live_link=live_link)
+
+def clean_certificate(data):
+    title = sanitize_input(data.get("title"))
+    issuer = sanitize_input(data.get("issuer"))
+    issued_date = sanitize_input(data.get("issued_date"))
+    link = sanitize_input(data.get("link"))
+    if not title or not issuer or not issued_date:
+        raise ValueError("Title, issuer and issue date are required!")
+    if link and not re.match(URL_PATTERN, link):
+        raise ValueError("Invalid certificate URL format!")
+    return dict(title=title, issuer=issuer, issued_date=issued_date, link=link)
+
+def clean_skill(data):
+    name = sanitize_input(data.get("name"))
+    category = sanitize_input(data.get("category"))
+    try:
+        proficiency = int(data.get("proficiency", 50))
+        years_experience = float(data.get("years_experience", 0))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid proficiency or experience values!")
+    if not name or not category:
+        raise ValueError("Name and category are required!")
+    if proficiency < 1 or proficiency > 100:
+        raise ValueError("Proficiency must be between 1 and 100!")
+    if years_experience < 0 or years_experience > 50:
+        raise ValueError("Years of experience must be between 0 and 50!")
+    return dict(name=name, category=category, proficiency=proficiency, years_experience=years_experience)
+
+def checkboxes(form, *fields):
+    """Form data with the given checkbox fields as booleans (present = ticked)"""
+    return {**form.to_dict(), **{field: field in form for field in fields}}
+
+def clean_flag(data, field):
+    try:
+        return boolean(data.get(field, False))
+    except ValueError:
+        raise ValueError(f"{field.title()} must be true or false!")
+
+def clean_blog_post(data):
+    """Post columns except the slug, which needs a uniqueness check"""
+    title = sanitize_input(data.get("title"))
+    content = data.get("content") or ""  # Don't sanitize content as it may contain HTML
+    try:
+        read_time = int(data.get("read_time", 5))
+    except (ValueError, TypeError):
+        read_time = 5
+    if not title or not content:
+        raise ValueError("Title and content are required!")
+    if read_time < 1 or read_time > 120:
+        raise ValueError("Read time must be between 1 and 120 minutes!")
+    return dict(title=title, content=str(content), excerpt=sanitize_input(data.get("excerpt")),
+                tags=sanitize_input(data.get("tags")), published=clean_flag(data, "published"),
+                featured=clean_flag(data, "featured"), read_time=read_time)
+
+def clean_code_snippet(data):
+    title = sanitize_input(data.get("title"))
+    language = sanitize_input(data.get("language"))
+    code = data.get("code") or ""  # Code is shown escaped, never sanitized
+    if not title or not language or not code:
+        raise ValueError("Title, language and code are required!")
+    return dict(title=title, description=sanitize_input(data.get("description")), language=language,
+                code=str(code), tags=sanitize_input(data.get("tags")), featured=clean_flag(data, "featured"))
+
 
 # --- Admin Dashboard ---
 @app.route("/admin")
 @admin_required
 def admin_dashboard():
-    logs = VisitorLog.query.order_by(VisitorLog.timestamp.desc()).limit(20).all()
-    projects = Project.query.all()
-    messages = ProductMessage.query.order_by(ProductMessage.created_at.desc()).all()
-    certificates = Certificate.query.all()
+    # Only single-row reads here; every table panel loads from /api/admin/<panel>
     profile = Profile.query.first()
-    skills = Skill.query.all()
-    blog_posts = BlogPost.query.order_by(BlogPost.created_at.desc()).limit(10).all()
-    code_snippets = CodeSnippet.query.order_by(CodeSnippet.created_at.desc()).limit(10).all()
-    inquiries = ContactInquiry.query.order_by(ContactInquiry.created_at.desc()).limit(20).all()
     github_stats = GitHubStats.query.first()
     
-    # Recent activity stats
-    stats = {
-        'total_projects': len(projects),
-        'total_blog_posts': BlogPost.query.filter_by(published=True).count(),
-        'total_skills': len(skills),
-        'total_inquiries': ContactInquiry.query.count(),
-        'unread_inquiries': ContactInquiry.query.filter_by(status='new').count(),
-        'high_priority_inquiries': ContactInquiry.query.filter_by(priority='high', status='new').count()
-    }
-    
     current_year = datetime.now().year
     age = profile.age if profile else ""
     
     return render_template("admin.html", 
-                         logs=logs, 
-                         projects=projects, 
-                         messages=messages, 
-                         certificates=certificates, 
-                         skills=skills,
-                         blog_posts=blog_posts,
-                         code_snippets=code_snippets,
-                         inquiries=inquiries,
                          github_stats=github_stats,
-
-                         stats=stats,
+                         stats=admin_stats(),
                          age=age, 
                          year=current_year)
+
+def admin_stats():
+    """Dashboard counters in one query; each count is answered from an index"""
+    def count(model, *criteria):
+        return select(func.count()).select_from(model).where(*criteria).scalar_subquery()
+    row = db.session.execute(select(
+        count(Project).label('total_projects'),
+        count(BlogPost, BlogPost.published == True).label('total_blog_posts'),
+        count(Skill).label('total_skills'),
+        count(ContactInquiry).label('total_inquiries'),
+        count(ContactInquiry, ContactInquiry.status == 'new').label('unread_inquiries'),
+        count(ContactInquiry, ContactInquiry.status == 'new',
+              ContactInquiry.priority == 'high').label('high_priority_inquiries'),
+    )).one()
+    return row._asdict()
+
+# Dashboard panels: query, the columns the rows show and, for tables that
+# grow without bound, the (time, id) keys of their cursor pagination
+ADMIN_PANELS = {
+    'inquiries': (
+        lambda: ContactInquiry.query,
+        ('id', 'name', 'email', 'subject', 'message', 'category', 'priority', 'status', 'created_at'),
+        (ContactInquiry.created_at, ContactInquiry.id),
+    ),
+    'visitor_logs': (
+        lambda: VisitorLog.query,
+        ('id', 'ip', 'user_agent', 'path', 'timestamp'),
+        (VisitorLog.timestamp, VisitorLog.id),
+    ),
+    'triage_rules': (
+        lambda: TriageRule.query.order_by(TriageRule.action, TriageRule.pattern),
+        ('id', 'pattern', 'action', 'value', 'weight'),
+        None,
+    ),
+    'skills': (
+        lambda: Skill.query.order_by(Skill.id),
+        ('id', 'name', 'category', 'proficiency', 'years_experience'),
+        None,
+    ),
+    'blog_posts': (
+        lambda: BlogPost.query,
+        ('id', 'title', 'slug', 'published', 'featured', 'views', 'created_at'),
+        (BlogPost.created_at, BlogPost.id),
+    ),
+    'code_snippets': (
+        lambda: CodeSnippet.query.order_by(CodeSnippet.created_at.desc(), CodeSnippet.id.desc()),
+        ('id', 'title', 'language', 'featured', 'created_at'),
+        None,
+    ),
+    'messages': (
+        lambda: ProductMessage.query.order_by(ProductMessage.created_at.desc(), ProductMessage.id.desc()),
+        ('id', 'product', 'message', 'created_at'),
+        None,
+    ),
+    'projects': (
+        lambda: Project.query.order_by(Project.id),
+        ('id', 'title', 'description', 'created_at'),
+        None,
+    ),
+    'certificates': (
+        lambda: Certificate.query.order_by(Certificate.id),
+        ('id', 'title', 'issuer', 'issued_date', 'link'),
+        None,
+    ),
+}
+
+@app.route("/api/admin/<panel>")
+@limiter.exempt  # a dashboard load fetches every panel
+@admin_required
+def admin_panel(panel):
+    if panel not in ADMIN_PANELS:
+        abort(404)
+    query_factory, fields, keys = ADMIN_PANELS[panel]
+    per_page = min(max(request.args.get('per_page', app.config['ADMIN_PANEL_PAGE_SIZE'], type=int), 1), 100)
+    cursor = request.args.get('cursor')
+    if panel == 'blog_posts':
+        # Show views counted since the last write-back
+        view_counter.flush()
+    elif panel == 'visitor_logs' and not cursor:
+        visitor_log_buffer.flush()
+    
+    query = query_factory()
+    model = query.column_descriptions[0]['entity']
+    query = query.options(load_only(*(getattr(model, field) for field in fields)))
+    result = {"panel": panel, "per_page": per_page}
+    if keys is not None:
+        try:
+            page = keyset_paginator.paginate(query, keys, cursor=cursor, per_page=per_page, count_key=panel)
+        except InvalidCursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        rows = page.items
+        result.update(has_next=page.next_cursor is not None, next_cursor=page.next_cursor,
+                      prev_cursor=page.prev_cursor, total=page.total)
+    else:
+        page = max(request.args.get('page', 1, type=int), 1)
+        # One extra row tells whether there is a next page, without a COUNT
+        rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+        result.update(page=page, has_next=len(rows) > per_page)
+        rows = rows[:per_page]
+    
+    render_rows = get_template_attribute('admin_rows.html', panel)
+    result.update(
+        items=[{
+            field: value.isoformat() if isinstance(value, datetime) else value
+            for field, value in ((field, getattr(row, field)) for field in fields)
+        } for row in rows],
+        html=str(render_rows(rows)),
+    )
+    return jsonify(result)
+
+# Exportable tables: model, the time column filtered by start/end, the columns
+# written, and whether a status filter applies
+EXPORTS = {
+    'visitor_logs': (VisitorLog, 'timestamp', ('id', 'ip', 'user_agent', 'path', 'timestamp'), False),
+    'inquiries': (ContactInquiry, 'created_at',
+                  ('id', 'name', 'email', 'subject', 'message', 'category', 'priority', 'status',
+                   'ip_address', 'user_agent', 'created_at'), True),
+}
+
+@app.route("/admin/export/<dataset>")
+@admin_required
+def export_data(dataset):
+    """Stream a table as CSV or NDJSON (?format=, ?start=, ?end=, ?status=)"""
+    if dataset not in EXPORTS:
+        abort(404)
+    model, time_field, fields, has_status = EXPORTS[dataset]
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": "format must be 'csv' or 'ndjson'"}), 400
+    
+    time_column = getattr(model, time_field)
+    stmt = select(*(getattr(model, field) for field in fields))
+    try:
+        if request.args.get('start'):
+            stmt = stmt.where(time_column >= datetime.fromisoformat(request.args['start']))
+        if request.args.get('end'):
+            end = request.args['end']
+            # A bare date includes that whole day
+            end_at = datetime.fromisoformat(end) + (timedelta(days=1) if len(end) == 10 else timedelta(0))
+            stmt = stmt.where(time_column < end_at)
+    except ValueError:
+        return jsonify({"error": "Invalid start or end parameter"}), 400
+    status = request.args.get('status')
+    if status:
+        if not has_status:
+            return jsonify({"error": "status filter does not apply to this export"}), 400
+        stmt = stmt.where(model.status == status)
+    
+    if dataset == 'visitor_logs':
+        visitor_log_buffer.flush()
+    # Time order follows the index that also serves the date filter
+    stmt = stmt.order_by(time_column, model.id)
+    filename = f"{dataset}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}"
+    return streaming_export.response(stmt, fields, fmt, filename)
+
+# --- File Storage ---
+@app.route("/api/upload", methods=["POST"])
+@admin_required
+def upload_file():
+    """Store the posted 'file' parts; 'public=true' lets anyone download them"""
+    uploads = request.files.getlist("file")
+    if not uploads:
+        return jsonify({"error": "No file provided"}), 400
+    public = request.form.get("public") == "true"
+
+    stored = []
+    for upload in uploads:
+        try:
+            row, created = content_store.store(upload, public=public)
+        except ValueError as e:
+            return jsonify({"error": f"{upload.filename}: {e}", "files": stored}), 400
+        except OSError as e:
+            app.logger.error(f"Error storing upload {upload.filename}: {e}")
+            return jsonify({"error": "Upload failed", "files": stored}), 500
+        entry = {"id": row.id, "filename": row.filename, "size": row.size, "sha256": row.sha256,
+                 "url": url_for("download_file", id=row.id), "duplicate": not created}
+        if public and row.content_type.startswith("image/") and responsive_images.available():
+            try:
+                key = f"files/{row.sha256}"
+                responsive_images.generate(content_store.blob_path(row.sha256), key)
+                entry["srcset"] = {fmt: responsive_images.srcset(key, fmt) for fmt in ("webp", "jpeg")}
+            except Exception as e:
+                # The original is stored either way
+                app.logger.error(f"Error generating image variants for {row.filename}: {e}")
+        stored.append(entry)
+    return jsonify({"files": stored}), 201
+
+@app.route("/api/files/<int:id>")
+@limiter.exempt  # pages embed these like static files
+def download_file(id):
+    row = db.session.get(StoredFile, id)
+    # Private files do not exist for anyone but the admin
+    if row is None or not (row.public or session.get("admin_logged_in")):
+        abort(404)
+    return content_store.send_blob(row)
+
+@app.route("/api/cache/clear", methods=["POST"])
+@admin_required
+def clear_cache():
+    page_cache.clear()
+    return jsonify({"message": "Cache cleared successfully"})
+
+@app.route("/api/analytics")
+@admin_required
+def api_analytics():
+    """Visitor analytics served from the hourly/daily rollup tables"""
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": "granularity must be 'hour' or 'day'"}), 400
+
+    try:
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else datetime.utcnow()
+        if request.args.get('start'):
+            start = datetime.fromisoformat(request.args['start'])
+        else:
+            days = min(max(int(request.args.get('days', 7)), 1), 30)
+            start = end - timedelta(days=days)
+    except ValueError:
+        return jsonify({"error": "Invalid start, end or days parameter"}), 400
+
+    if start > end:
+        return jsonify({"error": "start must be before end"}), 400
+    if analytics_rollups.bucket_count(start, end, granularity) > app.config['ANALYTICS_MAX_BUCKETS']:
+        return jsonify({"error": "Requested range is too large for this granularity"}), 400
+
+    return jsonify(analytics_rollups.query(start, end, granularity))
 # Authentication Decorator
 
 @app.route("/login", methods=["GET", "POST"])
@@ -549,29 +1214,22 @@ def logout():
 @app.route("/admin/project/add", methods=["POST"])
 @admin_required
 def add_project():
-    title = sanitize_input(request.form.get("title"))
-    description = sanitize_input(request.form.get("description"))
-    github_link = sanitize_input(request.form.get("github"))
-    live_link = sanitize_input(request.form.get("live"))
-    
-    if not title or not description:
-        flash("Title and description are required!", "danger")
-        return redirect(url_for("admin_dashboard"))
-    
-    # Validate URLs if provided
-    url_pattern = r'^https?://[\w\.-]+\.[a-zA-Z]{2,}'
-    if github_link and not re.match(url_pattern, github_link):
-        flash("Invalid GitHub URL format!", "danger")
-        return redirect(url_for("admin_dashboard"))
-    
-    if live_link and not re.match(url_pattern, live_link):
-        flash("Invalid live URL format!", "danger")
+    try:
+        values = clean_project({
+            "title": request.form.get("title"),
+            "description": request.form.get("description"),
+            "github_link": request.form.get("github"),
+            "live_link": request.form.get("live"),
+        })
+    except ValueError as e:
+        flash(str(e), "danger")
         return redirect(url_for("admin_dashboard"))
     
     try:
-        new_project = Project(title=title, description=description, github_link=github_link, live_link=live_link)
+        new_project = Project(**values)
         db.session.add(new_project)
         db.session.commit()
+        page_cache.invalidate('home', 'projects')
         flash("Project added successfully!", "success")
     except Exception as e:
         db.session.rollback()
@@ -585,6 +1243,7 @@ def delete_project(id):
     p = Project.query.get_or_404(id)
     db.session.delete(p)
     db.session.commit()
+    page_cache.invalidate('home', 'projects')
     flash("Project deleted successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
@@ -600,14 +1259,16 @@ def delete_message(id):
 # --- Certificates Admin ---
 @app.route("/admin/certificate/add", methods=["POST"])
 def add_certificate():
-    title = request.form.get("title")
-    issuer = request.form.get("issuer")
-    issued_date = request.form.get("issued_date")
-    link = request.form.get("link")
+    try:
+        values = clean_certificate(request.form)
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("admin_dashboard"))
 
-    new_c = Certificate(title=title, issuer=issuer,issued_date=issued_date, link=link)
+    new_c = Certificate(**values)
     db.session.add(new_c)
     db.session.commit()
+    page_cache.invalidate('home')
     flash("Certificate added successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
@@ -616,6 +1277,7 @@ def delete_certificate(id):
     c = Certificate.query.get_or_404(id)
     db.session.delete(c)
     db.session.commit()
+    page_cache.invalidate('home')
     flash("Certificate deleted successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
@@ -637,32 +1299,17 @@ def update_age():
 @app.route("/admin/skill/add", methods=["POST"])
 @admin_required
 def add_skill():
-    name = sanitize_input(request.form.get("name"))
-    category = sanitize_input(request.form.get("category"))
-    
     try:
-        proficiency = int(request.form.get("proficiency", 50))
-        years_experience = float(request.form.get("years_experience", 0))
-    except (ValueError, TypeError):
-        flash("Invalid proficiency or experience values!", "danger")
-        return redirect(url_for("admin_dashboard"))
-    
-    if not name or not category:
-        flash("Name and category are required!", "danger")
-        return redirect(url_for("admin_dashboard"))
-    
-    if proficiency < 1 or proficiency > 100:
-        flash("Proficiency must be between 1 and 100!", "danger")
-        return redirect(url_for("admin_dashboard"))
-    
-    if years_experience < 0 or years_experience > 50:
-        flash("Years of experience must be between 0 and 50!", "danger")
+        values = clean_skill(request.form)
+    except ValueError as e:
+        flash(str(e), "danger")
         return redirect(url_for("admin_dashboard"))
     
     try:
-        skill = Skill(name=name, category=category, proficiency=proficiency, years_experience=years_experience)
+        skill = Skill(**values)
         db.session.add(skill)
         db.session.commit()
+        page_cache.invalidate('home', 'skills')
         flash("Skill added successfully!", "success")
     except Exception as e:
         db.session.rollback()
@@ -677,57 +1324,36 @@ def delete_skill(id):
     skill = Skill.query.get_or_404(id)
     db.session.delete(skill)
     db.session.commit()
+    page_cache.invalidate('home', 'skills')
     flash("Skill deleted successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
 # --- Blog Management ---
+def blog_cache_groups(post):
+    """Cached pages showing this post: listings, itself and articles listing it as related"""
+    neighbour_slugs = db.session.query(BlogPost.slug).join(
+        RelatedPost, RelatedPost.post_id == BlogPost.id
+    ).filter(RelatedPost.related_id == post.id).all()
+    return ['home', 'blog', f'post:{post.slug}'] + [f'post:{slug}' for slug, in neighbour_slugs]
+
 @app.route("/admin/blog/add", methods=["POST"])
 @admin_required
 def add_blog_post():
-    title = sanitize_input(request.form.get("title"))
-    content = request.form.get("content", "")  # Don't sanitize content as it may contain HTML
-    excerpt = sanitize_input(request.form.get("excerpt"))
-    tags = sanitize_input(request.form.get("tags"))
-    published = bool(request.form.get("published"))
-    featured = bool(request.form.get("featured"))
-    
     try:
-        read_time = int(request.form.get("read_time", 5))
-    except (ValueError, TypeError):
-        read_time = 5
-    
-    if not title or not content:
-        flash("Title and content are required!", "danger")
-        return redirect(url_for("admin_dashboard"))
-    
-    if read_time < 1 or read_time > 120:
-        flash("Read time must be between 1 and 120 minutes!", "danger")
+        values = clean_blog_post(checkboxes(request.form, 'published', 'featured'))
+    except ValueError as e:
+        flash(str(e), "danger")
         return redirect(url_for("admin_dashboard"))
     
-    # Generate slug from title
-    slug = re.sub(r'[^a-zA-Z0-9\s-]', '', title.lower())
-    slug = re.sub(r'\s+', '-', slug).strip('-')
-    
-    # Ensure unique slug
-    original_slug = slug
-    counter = 1
-    while BlogPost.query.filter_by(slug=slug).first():
-        slug = f"{original_slug}-{counter}"
-        counter += 1
+    # Slug from the title, suffixed if taken; one query however many collide
+    slug, = unique_slugs(db.session, BlogPost.slug, [slugify(values["title"])])
     
     try:
-        post = BlogPost(
-            title=title,
-            slug=slug,
-            content=content,
-            excerpt=excerpt,
-            tags=tags,
-            published=published,
-            featured=featured,
-            read_time=read_time
-        )
+        post = BlogPost(slug=slug, **values)
         db.session.add(post)
         db.session.commit()
+        page_cache.invalidate(*blog_cache_groups(post))
+        keyset_paginator.invalidate('blog')
         flash("Blog post added successfully!", "success")
     except Exception as e:
         db.session.rollback()
@@ -740,8 +1366,12 @@ def add_blog_post():
 @admin_required
 def delete_blog_post(id):
     post = BlogPost.query.get_or_404(id)
+    # Collected first: the related-post rows go with the post
+    groups = blog_cache_groups(post)
     db.session.delete(post)
     db.session.commit()
+    page_cache.invalidate(*groups)
+    keyset_paginator.invalidate('blog')
     flash("Blog post deleted successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
@@ -749,23 +1379,16 @@ def delete_blog_post(id):
 @app.route("/admin/snippet/add", methods=["POST"])
 @admin_required
 def add_code_snippet():
-    title = request.form.get("title")
-    description = request.form.get("description")
-    language = request.form.get("language")
-    code = request.form.get("code")
-    tags = request.form.get("tags")
-    featured = bool(request.form.get("featured"))
-    
-    snippet = CodeSnippet(
-        title=title,
-        description=description,
-        language=language,
-        code=code,
-        tags=tags,
-        featured=featured
-    )
+    try:
+        values = clean_code_snippet(checkboxes(request.form, 'featured'))
+    except ValueError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("admin_dashboard"))
+    
+    snippet = CodeSnippet(**values)
     db.session.add(snippet)
     db.session.commit()
+    page_cache.invalidate('home', 'snippets')
     flash("Code snippet added successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
@@ -775,6 +1398,7 @@ def delete_code_snippet(id):
     snippet = CodeSnippet.query.get_or_404(id)
     db.session.delete(snippet)
     db.session.commit()
+    page_cache.invalidate('home', 'snippets')
     flash("Code snippet deleted successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
@@ -785,6 +1409,7 @@ def update_inquiry_status(id):
     inquiry = ContactInquiry.query.get_or_404(id)
     status = request.form.get("status")
     inquiry.status = status
+    inquiry.triaged = False  # re-running triage leaves it alone from now on
     db.session.commit()
     flash("Inquiry status updated successfully!", "success")
     return redirect(url_for("admin_dashboard"))
@@ -795,9 +1420,150 @@ def delete_inquiry(id):
     inquiry = ContactInquiry.query.get_or_404(id)
     db.session.delete(inquiry)
     db.session.commit()
+    keyset_paginator.invalidate('inquiries')
     flash("Inquiry deleted successfully!", "success")
     return redirect(url_for("admin_dashboard"))
 
+# --- Bulk Import / Export ---
+INQUIRY_STATUSES = ('new', 'read', 'replied', 'closed', 'spam')
+
+BULK_DATASETS = {
+    'projects': BulkDataset(Project, ('title', 'description', 'github_link', 'live_link', 'created_at'),
+                            clean_project, {}),
+    'skills': BulkDataset(Skill, ('name', 'category', 'proficiency', 'years_experience', 'created_at'),
+                          clean_skill, {}),
+    'certificates': BulkDataset(Certificate, ('title', 'issuer', 'issued_date', 'link'),
+                                clean_certificate, {}),
+    'blog_posts': BulkDataset(BlogPost, ('title', 'slug', 'content', 'excerpt', 'tags', 'published',
+                                         'featured', 'read_time', 'created_at'),
+                              clean_blog_post, {'published': boolean, 'featured': boolean}),
+    'code_snippets': BulkDataset(CodeSnippet, ('title', 'description', 'language', 'code', 'tags',
+                                               'featured', 'created_at'),
+                                 clean_code_snippet, {'featured': boolean}),
+    # Batch changes only
+    'inquiries': BulkDataset(ContactInquiry, ('name', 'email', 'subject', 'category', 'priority',
+                                              'status', 'created_at'),
+                             None, {'status': choice(*INQUIRY_STATUSES), 'priority': choice(*PRIORITIES)},
+                             {'triaged': False}),
+}
+bulk_data = BulkData(app, db, BULK_DATASETS)
+
+def bulk_written(names):
+    """Bring caches and derived tables up to date after bulk writes"""
+    if 'blog_posts' in names:
+        # Core statements skip the flush hooks that maintain these
+        tag_index.rebuild()
+        related_posts.rebuild()
+        keyset_paginator.invalidate('blog')
+        # Every post page may have changed; cheaper than naming them all
+        page_cache.clear()
+    groups = {'projects': ('home', 'projects'), 'skills': ('home', 'skills'),
+              'certificates': ('home',), 'code_snippets': ('home', 'snippets')}
+    page_cache.invalidate(*{group for name in names for group in groups.get(name, ())})
+    if 'inquiries' in names:
+        keyset_paginator.invalidate('inquiries')
+
+@app.route("/api/admin/bulk", methods=["GET", "POST"])
+@admin_required
+def bulk_import_export():
+    """GET: export datasets as JSON (?datasets=a,b); POST: import {dataset: [rows]}"""
+    if request.method == "GET":
+        names = [name for name in request.args.get('datasets', '').split(',') if name]
+        try:
+            return jsonify(bulk_data.export(names or None))
+        except BulkError as e:
+            return jsonify({"error": str(e)}), 400
+
+    try:
+        counts = bulk_data.import_data(request.get_json(silent=True))
+    except BulkError as e:
+        return jsonify({"error": "Import rejected", "errors": e.errors}), 400
+    except Exception as e:
+        app.logger.error(f"Error importing data: {e}")
+        return jsonify({"error": "Import failed"}), 500
+    bulk_written(counts)
+    return jsonify({"imported": counts})
+
+@app.route("/api/admin/bulk/<dataset>", methods=["POST"])
+@admin_required
+def bulk_change(dataset):
+    """Batch update or delete: {"action": "update", "ids": [...], "values": {...}} or {"action": "delete", "ids": [...]}"""
+    if dataset not in BULK_DATASETS:
+        abort(404)
+    data = request.get_json(silent=True) or {}
+    action = data.get("action")
+    try:
+        if action == "update":
+            count = bulk_data.update(dataset, data.get("ids"), data.get("values"))
+        elif action == "delete":
+            count = bulk_data.delete(dataset, data.get("ids"))
+        else:
+            return jsonify({"error": "action must be 'update' or 'delete'"}), 400
+    except BulkError as e:
+        return jsonify({"error": str(e), "errors": e.errors}), 400
+    except Exception as e:
+        app.logger.error(f"Error in bulk {action} of {dataset}: {e}")
+        return jsonify({"error": f"Bulk {action} failed"}), 500
+    bulk_written([dataset])
+    return jsonify({"action": action, "dataset": dataset, "count": count})
+
+# --- Inquiry Triage Rules ---
+@app.route("/admin/triage/rule/add", methods=["POST"])
+@admin_required
+def add_triage_rule():
+    pattern = sanitize_input(request.form.get("pattern", "")).strip()[:100]
+    action = request.form.get("action")
+    value = sanitize_input(request.form.get("value", "")).strip()[:50]
+    
+    try:
+        weight = int(request.form.get("weight", 1))
+    except (ValueError, TypeError):
+        weight = 1
+    
+    if len(pattern) < 2 or action not in TRIAGE_ACTIONS:
+        flash("A phrase of at least 2 characters and a valid action are required!", "danger")
+        return redirect(url_for("admin_dashboard"))
+    
+    if action == 'priority' and value not in PRIORITIES:
+        flash("Priority rules need a value of low, normal or high!", "danger")
+        return redirect(url_for("admin_dashboard"))
+    
+    if action == 'category' and not value:
+        flash("Category rules need a category name!", "danger")
+        return redirect(url_for("admin_dashboard"))
+    
+    try:
+        db.session.add(TriageRule(pattern=pattern, action=action, value=value if action != 'spam' else '',
+                                  weight=min(max(weight, 1), 10)))
+        db.session.commit()
+        inquiry_triage.invalidate()
+        changed = inquiry_triage.retriage_all()
+        flash(f"Triage rule added; {changed} inquiries re-triaged.", "success")
+    except Exception as e:
+        db.session.rollback()
+        app.logger.error(f"Error adding triage rule: {e}")
+        flash("Error adding triage rule!", "danger")
+    
+    return redirect(url_for("admin_dashboard"))
+
+@app.route("/admin/triage/rule/delete/<int:id>", methods=["POST"])
+@admin_required
+def delete_triage_rule(id):
+    rule = TriageRule.query.get_or_404(id)
+    db.session.delete(rule)
+    db.session.commit()
+    inquiry_triage.invalidate()
+    changed = inquiry_triage.retriage_all()
+    flash(f"Triage rule deleted; {changed} inquiries re-triaged.", "success")
+    return redirect(url_for("admin_dashboard"))
+
+@app.route("/admin/triage/rerun", methods=["POST"])
+@admin_required
+def retriage_inquiries():
+    changed = inquiry_triage.retriage_all()
+    flash(f"Re-triaged inquiries; {changed} updated.", "success")
+    return redirect(url_for("admin_dashboard"))
+
 # --- GitHub Stats Update ---
 @app.route("/admin/github/update", methods=["POST"])
 @admin_required
@@ -809,32 +1575,16 @@ def manual_github_update():
         flash(f"Error updating GitHub stats: {e}", "danger")
     return redirect(url_for("admin_dashboard"))
 
+github_fetcher = GitHubFetcher(app)
+
 def update_github_stats():
     """Update GitHub statistics from API"""
-    username = "vishaldeshmukh2k6"  # Your GitHub username
+    username = app.config['GITHUB_USERNAME']
     
     try:
-        # Set timeout and headers for security
-        headers = {'User-Agent': 'Portfolio-Website/1.0'}
-        timeout = 10
-        
-        # Get user info
-        user_response = requests.get(
-            f"https://api.github.com/users/{username}", 
-            headers=headers, 
-            timeout=timeout
-        )
-        user_response.raise_for_status()
-        user_data = user_response.json()
-        
-        # Get repositories
-        repos_response = requests.get(
-            f"https://api.github.com/users/{username}/repos?per_page=100", 
-            headers=headers, 
-            timeout=timeout
-        )
-        repos_response.raise_for_status()
-        repos_data = repos_response.json()
+        # Conditional requests over a pooled session; every repo page is fetched
+        user_data = github_fetcher.get_json(f"/users/{username}")
+        repos_data = github_fetcher.get_paginated(f"/users/{username}/repos", {'per_page': 100})
         
         # Validate response data
         if not isinstance(repos_data, list):
@@ -874,6 +1624,7 @@ def update_github_stats():
             db.session.add(stats)
         
         db.session.commit()
+        page_cache.invalidate('home')
         
     except Exception as e:
         app.logger.error(f"Error updating GitHub stats: {e}")
@@ -891,6 +1642,8 @@ def update_github_stats():
             db.session.add(default_stats)
             db.session.commit()
 
+github_stats_refresher = GitHubStatsRefresher(app, GitHubStats, update_github_stats)
+
 # --- Error Handlers ---
 @app.errorhandler(404)
 def not_found_error(e):
@@ -926,6 +1679,139 @@ def handle_csrf_error(e):
 
 
 
+# --- CLI ---
+@app.cli.command("init-db")
+def init_db_command():
+    """Create tables, indexes and triggers, seed defaults and backfill derived data"""
+    initialize_app()
+
+@app.cli.command("db-upgrade")
+def db_upgrade_command():
+    """Apply pending schema migrations to an existing database"""
+    with app.app_context():
+        applied = schema_migrations.upgrade()
+    print(f"Applied {len(applied)} migrations" + (f": {', '.join(applied)}" if applied else ""))
+
+@app.cli.command("check-query-plans")
+def check_query_plans_command():
+    """EXPLAIN the queries behind the main routes; fail on full scans and unindexed sorts"""
+    with app.app_context():
+        post = BlogPost.query.filter_by(published=True).first()
+        tag = Tag.query.first()
+        snippet = CodeSnippet.query.first()
+    paths = ['/', '/blog', '/blog?search=flask', '/code-snippets',
+             '/code-snippets?search=flask', '/api/projects', '/api/skills', '/api/github-stats',
+             '/api/search?q=flask', '/health']
+    if post:
+        paths.append(f'/blog/{post.slug}')
+        cursor = keyset_paginator.encode('next', [post.created_at, post.id])
+        paths += [f'/blog?cursor={cursor}', f'/api/blog?cursor={cursor}']
+    if tag:
+        paths.append(f'/blog?tag={tag.name}')
+    if snippet:
+        paths.append(f'/code-snippets?language={snippet.language}')
+    # Every request must reach the database
+    limiter.enabled = False
+    page_cache.clear()
+    admin_paths = ['/admin', '/api/analytics', *(f'/api/admin/{panel}' for panel in ADMIN_PANELS)]
+    problems = query_plan_checker.check(paths, admin_paths=admin_paths)
+    for problem in problems:
+        print(f"{problem.path}: {problem.reason}\n  {problem.statement}\n  " + '\n  '.join(problem.plan))
+    if problems:
+        raise click.ClickException(f"{len(problems)} queries without a usable index")
+    print(f"Query plans OK for {len(paths) + len(admin_paths)} paths")
+
+@app.cli.command("build-assets")
+def build_assets_command():
+    """Write content-hashed, minified and precompressed static files and their manifest"""
+    manifest = asset_manifest.build()
+    print(f"Built {len(manifest)} assets into {os.path.join(app.static_folder, asset_manifest.dist)}")
+
+@app.cli.command("build-images")
+def build_images_command():
+    """Generate responsive WebP/JPEG variants of the images under static/"""
+    if not responsive_images.available():
+        print("Pillow is not installed; images are served as they are")
+        return
+    built = responsive_images.build()
+    print(f"Image variants ready for {len(built)} images")
+
+@app.cli.command("export-data")
+@click.option("--dataset", "datasets", multiple=True, type=click.Choice(list(BULK_DATASETS)),
+              help="Dataset to export (repeatable); default: every importable one.")
+@click.argument("output", type=click.File("w"), default="-")
+def export_data_command(datasets, output):
+    """Write projects, skills, certificates, blog posts and snippets as JSON"""
+    json.dump(bulk_data.export(list(datasets)), output, indent=2)
+    output.write("\n")
+
+@app.cli.command("import-data")
+@click.argument("source", type=click.File("r"))
+def import_data_command(source):
+    """Insert every row of a JSON export in one transaction (ids are reassigned)"""
+    try:
+        counts = bulk_data.import_data(json.load(source))
+    except ValueError as e:  # BulkError or malformed JSON
+        raise click.ClickException(str(e) if not isinstance(e, BulkError) else '\n'.join(e.errors))
+    bulk_written(counts)
+    print("Imported " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+
+@app.cli.command("retriage-inquiries")
+def retriage_inquiries_command():
+    """Re-score every contact inquiry with the current triage rules"""
+    changed = inquiry_triage.retriage_all()
+    print(f"Re-triaged inquiries; {changed} updated")
+
+@app.cli.command("send-mail")
+def send_mail_command():
+    """Deliver every due message in the mail outbox now"""
+    sent = mail_outbox.send_pending()
+    print(f"Sent {sent} queued messages")
+
+@app.cli.command("analytics-rollup")
+def analytics_rollup_command():
+    """Fold any un-aggregated VisitorLog rows into the analytics rollups"""
+    visitor_log_buffer.flush()
+    processed = analytics_rollups.update()
+    print(f"Rolled up {processed} visitor log rows")
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Re-index every blog post, code snippet and project"""
+    if not search_index.create():
+        print("SQLite FTS5 is not available")
+        return
+    search_index.rebuild()
+    print("Search index rebuilt")
+
+@app.cli.command("rebuild-tag-index")
+def rebuild_tag_index_command():
+    """Re-derive blog tags and per-tag post counts from BlogPost.tags"""
+    count = tag_index.rebuild()
+    print(f"Tag index rebuilt from {count} posts")
+
+@app.cli.command("rebuild-related-posts")
+def rebuild_related_posts_command():
+    """Recompute the related-post lists of every published post"""
+    count = related_posts.rebuild()
+    print(f"Related posts computed for {count} posts")
+
+@app.cli.command("prune-visitor-logs")
+@click.option("--enable-incremental-vacuum", is_flag=True,
+              help="Switch the SQLite file to auto_vacuum=INCREMENTAL first (runs VACUUM once).")
+def prune_visitor_logs_command(enable_incremental_vacuum):
+    """Delete (or archive) visitor data older than ANALYTICS_RETENTION_DAYS"""
+    visitor_log_buffer.flush()
+    if app.config['ANALYTICS_ENABLED']:
+        analytics_rollups.update()
+    if enable_incremental_vacuum:
+        visitor_log_retention.enable_incremental_vacuum()
+        print("Incremental vacuum enabled")
+    result = visitor_log_retention.run()
+    print(f"Pruned {result['pruned']} rows, archived {result['archived']}, "
+          f"reclaimed {result['bytes_reclaimed']} bytes")
+
+
 # --- Main ---
 def initialize_app():
     """Initialize application data"""
@@ -935,6 +1821,37 @@ def initialize_app():
             db.create_all()
             print("Database tables created successfully")
             
+            # Bring tables that predate newer indexes up to date
+            applied = schema_migrations.upgrade()
+            if applied:
+                print(f"Applied migrations: {', '.join(applied)}")
+            
+            # Full-text search index and its sync triggers
+            if search_index.create():
+                print("Search index ready")
+            
+            # Change counters behind ETag / Last-Modified
+            if content_versions.create():
+                print("Content versions ready")
+            
+            # Backfill the tag index for databases that predate it
+            try:
+                if tag_index.is_empty() and BlogPost.query.filter(BlogPost.tags != '').first():
+                    tag_index.rebuild()
+                    print("Tag index built")
+            except Exception as e:
+                print(f"Tag index error: {e}")
+                db.session.rollback()
+            
+            # Backfill related-post lists for databases that predate them
+            try:
+                if related_posts.is_empty() and BlogPost.query.filter_by(published=True).first():
+                    related_posts.rebuild()
+                    print("Related posts computed")
+            except Exception as e:
+                print(f"Related posts error: {e}")
+                db.session.rollback()
+            
             # Create upload directory
             try:
                 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -963,6 +1880,14 @@ def initialize_app():
                 print(f"Skills initialization error: {e}")
                 db.session.rollback()
             
+            # Triage rules start out as the former built-in keyword lists
+            try:
+                if inquiry_triage.seed():
+                    print("Default triage rules added")
+            except Exception as e:
+                print(f"Triage rules initialization error: {e}")
+                db.session.rollback()
+            
             # Initialize GitHub stats (optional)
             try:
                 update_github_stats()
@@ -974,15 +1899,34 @@ def initialize_app():
         print(f"App initialization error: {e}")
         raise
 
-# Initialize app for both development and production
-try:
-    initialize_app()
-except Exception as e:
-    print(f"Initialization error: {e}")
-    # Continue anyway for basic functionality
+# --- Startup ---
+# Importing this module does no database, file or network I/O. Schema work
+# happens in 'flask init-db'; each process only runs the read-only checks below.
+_warmed_up = False
+
+def warm_up():
+    """Detect which optional database features 'flask init-db' has set up"""
+    global _warmed_up
+    with app.app_context():
+        if not content_versions.detect():
+            app.logger.warning("Database not initialized; run 'flask init-db'")
+        elif schema_migrations.pending():
+            app.logger.warning("Database schema out of date; run 'flask db-upgrade'")
+        search_index.detect()
+    _warmed_up = True
+
+def create_app():
+    """Return the application ready to serve (gunicorn: 'app:create_app()')"""
+    warm_up()
+    with app.app_context():
+        # No pooled connection may outlive a fork into worker processes
+        for engine in db.engines.values():
+            engine.dispose()
+    return app
 
 if __name__ == "__main__":
     # Development server only
+    initialize_app()
     port = int(os.getenv('PORT', 5000))
     host = os.getenv('HOST', '0.0.0.0')
     app.run(debug=False, host=host, port=port)
@@ -0,0 +1,229 @@
+"""
+Fingerprinted static assets.
+
+``flask build-assets`` copies every file under static/ (except uploads
+and other ASSETS_EXCLUDE directories)
+to static/dist/ with a content hash in its name, minifying CSS and JS on
+the way, and writes .gz (and .br, with the optional ``brotli`` package)
+siblings of text files for nginx's gzip_static / brotli_static. The
+logical-to-hashed mapping goes to static/dist/manifest.json:
+
+    {"css/style.css": "dist/css/style.3f9c2a7b1e.css", ...}
+
+``url_for('static', filename='css/style.css')`` then resolves through the
+manifest, so templates keep logical names while URLs change with content
+and can be cached forever. Without a manifest (no build yet, or
+ASSETS_USE_MANIFEST off for development) URLs stay unhashed.
+
+JS is minified only when the optional ``rjsmin`` package is installed;
+CSS uses the small built-in minifier below. With rjsmin, inline <script>
+blocks of the HTML templates are minified too, as Jinja compiles each
+template (blocks containing Jinja syntax are left alone).
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+
+from flask import request
+from jinja2.ext import Extension
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:  # pragma: no cover - optional dependency
+    rjsmin = None
+
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.xml', '.html', '.map', '.ico'}
+
+# Strings are matched first so nothing inside them is touched
+_CSS_STRING = r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')'
+_CSS_COMMENTS = re.compile(_CSS_STRING + r'|/\*(?!!).*?\*/', re.DOTALL)  # /*! ... */ is kept
+_CSS_SPACES = re.compile(
+    _CSS_STRING +
+    r'|\s*;\s*(})\s*'        # last semicolon of a block
+    r'|\s*([{};,>])\s*'      # punctuation: no spaces around
+    r'|(:)\s+'               # colon: none after (one before may be a selector)
+    r'|(\s+)'                # other whitespace: one space
+)
+
+
+def minify_css(source):
+    """Drop comments (except /*! ... */) and redundant whitespace"""
+    def space(match):
+        string, block_end, punctuation, colon, whitespace = match.groups()
+        return string or block_end or punctuation or colon or (' ' if whitespace else '')
+    source = _CSS_COMMENTS.sub(lambda match: match.group(1) or '', source)
+    return _CSS_SPACES.sub(space, source).strip() + '\n'
+
+
+def minify_js(source):
+    return rjsmin.jsmin(source) + '\n' if rjsmin is not None else source
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+_INLINE_SCRIPT = re.compile(r'(<script\b([^>]*)>)(.*?)(</script>)', re.DOTALL | re.IGNORECASE)
+_SCRIPT_TYPE = re.compile(r'\btype\s*=\s*["\']?([^"\'\s>]+)', re.IGNORECASE)
+JS_TYPES = {'text/javascript', 'application/javascript', 'module'}
+
+
+def minify_inline_scripts(html):
+    """Minify inline JavaScript blocks that contain no Jinja syntax"""
+    if rjsmin is None:
+        return html
+
+    def replace(match):
+        opening, attributes, body, closing = match.groups()
+        script_type = _SCRIPT_TYPE.search(attributes)
+        if (not body.strip() or re.search(r'\bsrc\s*=', attributes, re.IGNORECASE)
+                or (script_type and script_type.group(1).lower() not in JS_TYPES)
+                or any(marker in body for marker in ('{{', '{%', '{#'))):
+            return match.group(0)
+        return opening + rjsmin.jsmin(body) + closing
+    return _INLINE_SCRIPT.sub(replace, html)
+
+
+class InlineScriptMinifier(Extension):
+    """Jinja extension running minify_inline_scripts() on .html templates as they compile"""
+
+    def preprocess(self, source, name, filename=None):
+        if name and name.endswith('.html'):
+            return minify_inline_scripts(source)
+        return source
+
+
+class AssetManifest:
+    """Build hashed assets and map static URLs onto them"""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.dist = 'dist'
+        self._manifest = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('ASSETS_USE_MANIFEST', self.enabled)
+        self.dist = app.config.get('ASSETS_DIST_DIR', self.dist)
+        # Directories of the static folder that are not build inputs (uploads, generated files)
+        self.exclude = {self.dist, *app.config.get('ASSETS_EXCLUDE', ('uploads',))}
+        app.url_defaults(self._hashed_static)
+        app.after_request(self._cache_headers)
+        if self.enabled and rjsmin is not None:
+            # Same switch as hashed URLs, so development keeps readable page source
+            app.jinja_env.add_extension(InlineScriptMinifier)
+        app.extensions['asset_manifest'] = self
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.app.static_folder, self.dist, MANIFEST_NAME)
+
+    @property
+    def manifest(self):
+        """Logical name -> hashed name; read once per process"""
+        if self._manifest is None:
+            with self._lock:
+                if self._manifest is None:
+                    self._manifest = self._read_manifest()
+        return self._manifest
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.app.logger.error(f"Asset manifest unreadable, serving unhashed URLs: {e}")
+            return {}
+
+    def _hashed_static(self, endpoint, values):
+        if endpoint == 'static' and self.enabled and 'filename' in values:
+            values['filename'] = self.manifest.get(values['filename'], values['filename'])
+
+    def _cache_headers(self, response):
+        # Hashed names never change content; without nginx in front, say so here
+        if (request.endpoint == 'static' and response.status_code == 200
+                and (request.view_args or {}).get('filename', '').startswith(self.dist + '/')):
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+    # --- Build ---
+    def sources(self):
+        """Logical names of the files under the static folder that get built"""
+        root = self.app.static_folder
+        for directory, subdirectories, files in os.walk(root):
+            relative = os.path.relpath(directory, root)
+            subdirectories[:] = sorted(
+                name for name in subdirectories
+                if not name.startswith('.') and os.path.normpath(os.path.join(relative, name)) not in self.exclude
+            )
+            for name in sorted(files):
+                if not name.startswith('.'):
+                    yield os.path.normpath(os.path.join(relative, name)).replace(os.sep, '/')
+
+    def build(self):
+        """Write hashed, minified and precompressed copies; returns the manifest"""
+        root = self.app.static_folder
+        previous = self._read_manifest()
+        manifest = {}
+        for logical in self.sources():
+            with open(os.path.join(root, logical), 'rb') as f:
+                content = f.read()
+            base, ext = os.path.splitext(logical)
+            ext = ext.lower()
+            if ext in MINIFIERS:
+                content = MINIFIERS[ext](content.decode('utf-8')).encode('utf-8')
+            digest = hashlib.sha256(content).hexdigest()[:10]
+            hashed = f"{self.dist}/{base}.{digest}{ext}"
+            target = os.path.join(root, hashed)
+            if not os.path.exists(target):
+                self._write(target, content)
+            if ext in COMPRESSIBLE:
+                self._compress(target, content)
+            manifest[logical] = hashed
+
+        self._write(self.manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+        # Pages rendered before this build may still reference the previous one
+        self._prune(set(manifest.values()) | set(previous.values()))
+        self._manifest = manifest
+        return manifest
+
+    @staticmethod
+    def _write(path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(content)
+        os.replace(temporary, path)
+
+    def _compress(self, target, content):
+        # Kept only when smaller; nginx falls back to the plain file
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            self._write(f"{target}.gz", compressed)
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                self._write(f"{target}.br", compressed)
+
+    def _prune(self, keep):
+        dist = os.path.join(self.app.static_folder, self.dist)
+        for directory, _, files in os.walk(dist):
+            for name in files:
+                path = os.path.join(directory, name)
+                relative = os.path.relpath(path, self.app.static_folder).replace(os.sep, '/')
+                if name == MANIFEST_NAME and directory == dist:
+                    continue
+                if re.sub(r'\.(gz|br)$', '', relative) not in keep:
+                    os.remove(path)
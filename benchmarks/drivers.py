@@ -0,0 +1,132 @@
+"""
+Ways of sending requests to the app.
+
+Both drivers expose ``request(path, admin=False) -> (status, body size)``
+and are safe to call from many threads. WSGIDriver calls the Flask app in
+this process (one test client per thread), which measures the app alone;
+GunicornDriver starts ``gunicorn.conf.py`` on a local port and talks HTTP
+to it, which adds the server, sockets and worker processes.
+"""
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+from benchmarks import REPO, environment
+
+
+def admin_session():
+    return {'admin_logged_in': True, 'last_activity': datetime.utcnow()}
+
+
+class WSGIDriver:
+    name = 'wsgi'
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def _client(self, admin):
+        attribute = 'admin' if admin else 'public'
+        client = getattr(self._local, attribute, None)
+        if client is None:
+            client = self.app.test_client()
+            if admin:
+                with client.session_transaction() as session:
+                    session.update(admin_session())
+            setattr(self._local, attribute, client)
+        return client
+
+    def request(self, path, admin=False):
+        response = self._client(admin).get(path)
+        try:
+            # Drain streamed bodies, as a real client would
+            size = sum(len(chunk) for chunk in response.iter_encoded())
+        finally:
+            response.close()
+        return response.status_code, size
+
+
+class GunicornDriver:
+    name = 'gunicorn'
+
+    def __init__(self, app, workdir, workers=2, env=None, startup_timeout=30):
+        self.app = app
+        self.workdir = os.path.abspath(workdir)
+        self.workers = workers
+        self.env = env or {}
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.port = None
+        serializer = app.session_interface.get_signing_serializer(app)
+        self.admin_cookie = f"{app.config['SESSION_COOKIE_NAME']}={serializer.dumps(admin_session())}"
+
+    @staticmethod
+    def _free_port():
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            return s.getsockname()[1]
+
+    def start(self):
+        self.port = self._free_port()
+        env = {**os.environ, **environment(self.workdir), **self.env}
+        self.log_path = os.path.join(self.workdir, 'gunicorn.log')
+        self._log = open(self.log_path, 'ab')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+             '--bind', f'127.0.0.1:{self.port}', '--workers', str(self.workers),
+             '--access-logfile', '/dev/null', '--error-logfile', '-'],
+            cwd=REPO, env=env, stdout=self._log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {self.process.returncode}; see {self.log_path}")
+            try:
+                if self.request('/health')[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"gunicorn did not answer within {self.startup_timeout}s; see {self.log_path}")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        if getattr(self, '_log', None) is not None:
+            self._log.close()
+            self._log = None
+
+    def request(self, path, admin=False):
+        # Sync workers close every connection, so there is nothing to keep alive
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            headers = {'Cookie': self.admin_cookie} if admin else {}
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            size = 0
+            while True:
+                chunk = response.read(65536)
+                if not chunk:
+                    break
+                size += len(chunk)
+            return response.status, size
+        finally:
+            connection.close()
@@ -0,0 +1,288 @@
+"""
+Load test every public and admin GET route and compare with a baseline.
+
+Each route gets --requests requests (after --warmup unmeasured ones) at
+each --concurrency level, one route at a time, and is reported with its
+throughput and p50/p95/p99 latency. With --baseline the run fails when a
+route's p95 grew by more than --tolerance (and by more than --min-ms, so
+sub-millisecond noise on fast routes is not a regression) or when any
+request failed. Baselines are machine specific: record one with
+--save-baseline on the machine that will run the comparison.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from benchmarks import REPO, apply_environment
+
+# GET endpoints not benchmarked: static files are nginx's job, logout ends the session
+SKIPPED_ENDPOINTS = {'static', 'logout'}
+
+
+def routes(app):
+    """(name, path, admin) for every benchmarked route, from the seeded data"""
+    from app import (ADMIN_PANELS, EXPORTS, BlogPost, CodeSnippet, StoredFile, Tag, VisitorLog, db,
+                     keyset_paginator)
+    with app.app_context():
+        first_log = db.session.query(db.func.min(VisitorLog.timestamp)).scalar()
+        post = BlogPost.query.filter_by(published=True).order_by(BlogPost.created_at.desc()).first()
+        tag = Tag.query.order_by(Tag.post_count.desc()).first()
+        snippet = CodeSnippet.query.first()
+        stored = StoredFile.query.filter_by(public=True).first()
+    table = [
+        ('index', '/', False),
+        ('blog', '/blog', False),
+        ('blog_search', '/blog?search=flask', False),
+        ('code_snippets', '/code-snippets', False),
+        ('code_snippets_search', '/code-snippets?search=sqlite', False),
+        ('api_projects', '/api/projects', False),
+        ('api_skills', '/api/skills', False),
+        ('api_github_stats', '/api/github-stats', False),
+        ('api_blog', '/api/blog', False),
+        ('api_search', '/api/search?q=cache', False),
+        ('health', '/health', False),
+        ('terms', '/terms', False),
+        ('login', '/login', False),
+        ('resume', '/resume', False),
+        ('admin', '/admin', True),
+        ('api_analytics', '/api/analytics', True),
+        ('api_analytics_hourly', '/api/analytics?granularity=hour&days=1', True),
+        ('admin_bulk_export', '/api/admin/bulk?datasets=projects,skills', True),
+    ]
+    if post is not None:
+        cursor = keyset_paginator.encode('next', [post.created_at, post.id])
+        table += [
+            ('blog_post', f'/blog/{post.slug}', False),
+            ('blog_post_views', f'/blog/{post.slug}/views', False),
+            ('blog_cursor', f'/blog?cursor={cursor}', False),
+            ('api_blog_cursor', f'/api/blog?cursor={cursor}', False),
+        ]
+    if tag is not None:
+        table.append(('blog_tag', f'/blog?tag={quote(tag.name)}', False))
+    if snippet is not None:
+        table.append(('code_snippets_language', f'/code-snippets?language={quote(snippet.language)}', False))
+    if stored is not None:
+        table.append(('api_file', f'/api/files/{stored.id}', False))
+    table += [(f'api_admin_{panel}', f'/api/admin/{panel}', True) for panel in ADMIN_PANELS]
+    # One hour of the oldest seeded data: a full export is a bulk job, not a request to time, and
+    # the requests of the run itself must not grow the window
+    start = (first_log or datetime.utcnow()).replace(microsecond=0)
+    window = f"start={start.isoformat()}&end={(start + timedelta(hours=1)).isoformat()}"
+    table += [(f'admin_export_{dataset}', f'/admin/export/{dataset}?{window}', True) for dataset in EXPORTS]
+    return table
+
+
+def uncovered(app, table):
+    """GET endpoints none of the benchmarked paths reach"""
+    adapter = app.url_map.bind('localhost')
+    covered = {adapter.match(path.split('?')[0])[0] for _, path, _ in table}
+    return sorted(
+        rule.rule for rule in app.url_map.iter_rules()
+        if 'GET' in rule.methods and rule.endpoint not in covered and rule.endpoint not in SKIPPED_ENDPOINTS
+    )
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of a sorted list"""
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+
+def measure(driver, path, admin, concurrency, count, warmup):
+    for _ in range(warmup):
+        driver.request(path, admin)
+    latencies = []
+    errors = []
+    remaining = [count]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                status, _ = driver.request(path, admin)
+            except Exception as e:
+                status = repr(e)
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if not (isinstance(status, int) and status < 400):
+                    errors.append(status)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_sample': sorted({str(status) for status in errors})[:3],
+        'rps': round(len(latencies) / wall, 1),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance, min_ms):
+    """Regression messages for results whose p95 exceeds the baseline's"""
+    previous = {(row['route'], row['concurrency']): row for row in baseline['results']}
+    problems = []
+    for row in results:
+        before = previous.get((row['route'], row['concurrency']))
+        if before is None:
+            continue
+        limit = max(before['p95_ms'] * (1 + tolerance), before['p95_ms'] + min_ms)
+        if row['p95_ms'] > limit:
+            problems.append(f"{row['route']} @{row['concurrency']}: p95 {row['p95_ms']}ms > {limit:.2f}ms "
+                            f"(baseline {before['p95_ms']}ms)")
+    return problems
+
+
+def dataset_sizes(app):
+    from app import BlogPost, CodeSnippet, ContactInquiry, VisitorLog, db
+    with app.app_context():
+        return {model.__tablename__: db.session.query(model).count()
+                for model in (BlogPost, CodeSnippet, VisitorLog, ContactInquiry)}
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    extra = {'CACHE_TYPE': args.cache}
+    apply_environment(args.workdir)
+    os.environ.update(extra)
+    if not os.path.exists(os.path.join(os.path.abspath(args.workdir), 'portfolio.db')):
+        sys.exit(f"No database in {args.workdir}; run 'python -m benchmarks.seed' first")
+
+    from app import create_app
+    from benchmarks.drivers import GunicornDriver, WSGIDriver
+
+    app = create_app()
+    table = routes(app)
+    if args.routes:
+        wanted = set(args.routes.split(','))
+        table = [route for route in table if route[0] in wanted]
+    missing = uncovered(app, table) if not args.routes else []
+    for rule in missing:
+        print(f"warning: GET {rule} is not benchmarked", file=sys.stderr)
+
+    if args.server == 'wsgi':
+        driver = WSGIDriver(app)
+    else:
+        driver = GunicornDriver(app, args.workdir, workers=args.workers, env=extra)
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    results = []
+    skipped = []
+    driver.start()
+    try:
+        for name, path, admin in table:
+            status, _ = driver.request(path, admin)
+            if status == 404:
+                skipped.append(name)  # e.g. /resume without a PDF in static/
+                continue
+            for concurrency in levels:
+                row = {'route': name, 'path': path, 'admin': admin, 'concurrency': concurrency,
+                       **measure(driver, path, admin, concurrency, args.requests, args.warmup)}
+                results.append(row)
+                print(f"{name:<28} c={concurrency:<3} {row['rps']:>8.1f} req/s  p50 {row['p50_ms']:>8.2f}  "
+                      f"p95 {row['p95_ms']:>8.2f}  p99 {row['p99_ms']:>8.2f} ms"
+                      + (f"  errors {row['errors']} {row['error_sample']}" if row['errors'] else ''),
+                      flush=True)
+    finally:
+        driver.stop()
+    if skipped:
+        print(f"Skipped (404): {', '.join(skipped)}")
+
+    report = {
+        'meta': {
+            'server': driver.name,
+            'workers': args.workers if driver.name == 'gunicorn' else None,
+            'cache': args.cache,
+            'requests': args.requests,
+            'data': dataset_sizes(app),
+            'revision': revision(),
+            'python': platform.python_version(),
+            'machine': platform.node(),
+            'finished_at': datetime.utcnow().isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"Wrote {path}")
+
+    failed = False
+    failures = [row for row in results if row['errors']]
+    if failures:
+        failed = True
+        print(f"{len(failures)} route runs had failed requests")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key in ('server', 'workers', 'cache'):
+            if baseline['meta'].get(key) != report['meta'][key]:
+                print(f"warning: baseline {key} {baseline['meta'].get(key)!r} differs from this run's "
+                      f"{report['meta'][key]!r}", file=sys.stderr)
+        for table, rows in report['meta']['data'].items():
+            # Runs add visitor logs, so only a different seed scale is worth a warning
+            before = baseline['meta']['data'].get(table, 0)
+            if abs(rows - before) > 0.1 * max(before, 1):
+                print(f"warning: baseline has {before} {table} rows, this run {rows}", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance, args.min_ms)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            failed = True
+        else:
+            print(f"No regressions against {args.baseline}")
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workdir', default='/tmp/portfolio-bench', help="Directory seeded by benchmarks.seed")
+    parser.add_argument('--server', choices=['wsgi', 'gunicorn'], default='wsgi')
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes")
+    parser.add_argument('--concurrency', default='1,8', help="Comma-separated client thread counts")
+    parser.add_argument('--requests', type=int, default=200, help="Measured requests per route and level")
+    parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per route first")
+    parser.add_argument('--cache', default='lru', choices=['lru', 'sqlite', 'null'],
+                        help="Page cache backend; 'null' times every page uncached")
+    parser.add_argument('--routes', help="Comma-separated route names to run (default: all)")
+    parser.add_argument('--output', help="Write the report as JSON")
+    parser.add_argument('--baseline', help="Report to compare with; exit 1 on regression")
+    parser.add_argument('--save-baseline', help="Write this run's report as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed p95 growth, as a fraction")
+    parser.add_argument('--min-ms', type=float, default=2.0, help="p95 growth always allowed, in ms")
+    sys.exit(run(parser.parse_args(argv)))
+
+
+if __name__ == '__main__':
+    main()
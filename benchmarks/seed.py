@@ -0,0 +1,227 @@
+"""
+Synthetic data generator for benchmark databases.
+
+Builds a fresh database in the work directory through the normal
+``init-db`` path, then bulk inserts deterministic fake content (the same
+--seed gives the same rows) and brings every derived table up to date:
+tag index, related posts, search index (its triggers fire on insert) and
+the analytics rollups, so a benchmark never pays for catch-up work.
+"""
+import argparse
+import io
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from werkzeug.datastructures import FileStorage
+
+from benchmarks import apply_environment
+
+WORDS = (
+    'python flask sqlite index query cache latency throughput worker thread async request response '
+    'template render cursor batch stream upload image asset deploy docker nginx gunicorn session '
+    'token security header search tag post snippet project skill analytics rollup retention vacuum '
+    'migration schema column table join scan sort page limit offset keyset json csv export import '
+    'api route view model engine pool pragma journal wal checkpoint lock write read replica benchmark '
+    'profile memory cpu disk network socket proxy redirect compress gzip brotli hash etag range'
+).split()
+TAGS = ['Python', 'Flask', 'SQLite', 'Performance', 'Caching', 'Databases', 'DevOps', 'Docker', 'Security',
+        'Testing', 'APIs', 'Frontend', 'JavaScript', 'CSS', 'Nginx', 'Linux', 'Async', 'Profiling',
+        'Search', 'Analytics', 'Deployment', 'Architecture', 'SQL', 'Web Development', 'Tutorial']
+LANGUAGES = ['python', 'javascript', 'typescript', 'sql', 'bash', 'go', 'rust', 'css', 'html', 'java',
+             'c', 'yaml']
+PATHS = ['/', '/', '/', '/blog', '/blog', '/code-snippets', '/api/projects', '/api/skills', '/terms',
+         '/api/search', '/health']
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/126.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 Version/17.5 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:127.0) Gecko/20100101 Firefox/127.0',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/126.0 Mobile Safari/537.36',
+    'curl/8.5.0',
+    'Googlebot/2.1 (+http://www.google.com/bot.html)',
+]
+BATCH = 50000
+# How SQLAlchemy stores DateTime in SQLite
+TIMESTAMP = '%Y-%m-%d %H:%M:%S.%f'
+
+
+def vocabulary(rng, topics):
+    """Per topic: content words and tags. Real posts share terms mostly within a topic, and
+    related-post scoring only compares posts sharing a term, so one flat vocabulary would
+    make every post a candidate for every other."""
+    syllables = [c + v for c in 'bcdfghklmnprstvz' for v in 'aeiou']
+    invented = set()
+    while len(invented) < topics * 72:
+        invented.add(''.join(rng.choices(syllables, k=rng.randint(2, 4))))
+    invented = sorted(invented)
+    rng.shuffle(invented)
+    tags = TAGS + [word.title() for word in invented[:75]]
+    return [
+        # A few real technical words per topic keep searches for them meaningful
+        (rng.sample(WORDS, 8) + invented[75 + i * 72:75 + (i + 1) * 72], rng.sample(tags, 3))
+        for i in range(topics)
+    ]
+
+
+def words(rng, vocab, low, high):
+    return ' '.join(rng.choices(vocab, k=rng.randint(low, high)))
+
+
+def spread(rng, count, start, end):
+    """count ascending timestamps between start and end"""
+    span = (end - start).total_seconds()
+    return [(start + timedelta(seconds=offset)).strftime(TIMESTAMP)
+            for offset in sorted(rng.random() * span for _ in range(count))]
+
+
+def insert(conn, sql, rows, label, total):
+    """executemany in batches, reporting progress"""
+    done = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            conn.exec_driver_sql(sql, batch)
+            done += len(batch)
+            batch = []
+            if done % (BATCH * 20) == 0:
+                print(f"  {label}: {done}/{total}", flush=True)
+    if batch:
+        conn.exec_driver_sql(sql, batch)
+    print(f"  {label}: {total} rows")
+
+
+def blog_posts(rng, count, now, topics):
+    for i, created in enumerate(spread(rng, count, now - timedelta(days=3 * 365), now)):
+        vocab, topic_tags = rng.choice(topics)
+        title = words(rng, vocab, 4, 9).title()
+        paragraphs = ''.join(f"<p>{words(rng, vocab, 40, 120)}</p>" for _ in range(rng.randint(3, 8)))
+        tags = ', '.join(rng.sample(topic_tags, rng.randint(1, 3)))
+        yield (title, f"{title.lower().replace(' ', '-')}-{i}", paragraphs, words(rng, vocab, 15, 30), tags,
+               rng.random() < 0.9, rng.random() < 0.05, rng.randint(2, 20), rng.randint(0, 50000),
+               created, created)
+
+
+def code_snippets(rng, count, now, topics):
+    for created in spread(rng, count, now - timedelta(days=3 * 365), now):
+        vocab, topic_tags = rng.choice(topics)
+        code = '\n'.join(f"    {words(rng, vocab, 3, 10)}" for _ in range(rng.randint(5, 40)))
+        yield (words(rng, vocab, 3, 7).title(), words(rng, vocab, 10, 25), rng.choice(LANGUAGES), code,
+               ', '.join(rng.sample(topic_tags, rng.randint(1, 3))), rng.random() < 0.03, created)
+
+
+def visitor_logs(rng, count, now, days):
+    ips = [f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(50000)]
+    start = now - timedelta(days=days)
+    step = (now - start).total_seconds() / max(count, 1)
+    # Evenly spaced with jitter, so ids ascend with time as in a real log
+    for i in range(count):
+        at = start + timedelta(seconds=i * step + rng.random() * step)
+        yield (rng.choice(ips), rng.choice(USER_AGENTS), rng.choice(PATHS), at.strftime(TIMESTAMP))
+
+
+def inquiries(rng, count, now):
+    for created in spread(rng, count, now - timedelta(days=365), now):
+        yield (f"Visitor {rng.randint(1, 99999)}", f"visitor{rng.randint(1, 99999)}@example.com",
+               words(rng, WORDS, 3, 8).capitalize(), words(rng, WORDS, 20, 80),
+               rng.choice(['general', 'project', 'job', 'collaboration']),
+               rng.choice(['low', 'normal', 'normal', 'high']),
+               rng.choice(['new', 'new', 'read', 'replied', 'closed', 'spam']),
+               '10.0.0.1', USER_AGENTS[0], created)
+
+
+def seed(args):
+    apply_environment(args.workdir)
+    database = os.path.join(os.path.abspath(args.workdir), 'portfolio.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(database + suffix):
+            os.remove(database + suffix)
+
+    import app as portfolio
+    from app import db
+
+    started = time.monotonic()
+    portfolio.initialize_app()
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    topics = vocabulary(rng, args.topics)
+
+    with portfolio.app.app_context():
+        with db.engine.begin() as conn:
+            insert(conn, "INSERT INTO project (title, description, github_link, live_link, created_at) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                   ((words(rng, WORDS, 2, 4).title(), words(rng, WORDS, 20, 60), f"https://github.com/example/project-{i}", '',
+                     created) for i, created in enumerate(spread(rng, args.projects, now - timedelta(days=900), now))),
+                   'projects', args.projects)
+            insert(conn, "INSERT INTO skill (name, category, proficiency, years_experience, created_at) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                   ((f"{rng.choice(WORDS).title()} {i}", rng.choice(['Backend', 'Frontend', 'Database', 'DevOps']),
+                     rng.randint(30, 100), round(rng.random() * 10, 1), now.strftime(TIMESTAMP))
+                    for i in range(args.skills)),
+                   'skills', args.skills)
+            insert(conn, "INSERT INTO certificate (title, issuer, issued_date, link) VALUES (?, ?, ?, ?)",
+                   ((words(rng, WORDS, 3, 6).title(), rng.choice(['Coursera', 'AWS', 'Google', 'Udemy']),
+                     f"{rng.randint(2018, 2026)}-{rng.randint(1, 12):02d}", f"https://example.com/cert/{i}")
+                    for i in range(args.certificates)),
+                   'certificates', args.certificates)
+            insert(conn, "INSERT INTO blog_post (title, slug, content, excerpt, tags, published, featured, "
+                         "read_time, views, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                   blog_posts(rng, args.posts, now, topics), 'blog posts', args.posts)
+            insert(conn, "INSERT INTO code_snippet (title, description, language, code, tags, featured, created_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                   code_snippets(rng, args.snippets, now, topics), 'code snippets', args.snippets)
+            insert(conn, "INSERT INTO contact_inquiry (name, email, subject, message, category, priority, status, "
+                         "ip_address, user_agent, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                   inquiries(rng, args.inquiries, now), 'inquiries', args.inquiries)
+            insert(conn, "INSERT INTO visitor_log (ip, user_agent, path, timestamp) VALUES (?, ?, ?, ?)",
+                   visitor_logs(rng, args.visitor_logs, now, args.log_days), 'visitor logs', args.visitor_logs)
+            # Fresh stats: pages never try to refresh them during a run
+            conn.exec_driver_sql("DELETE FROM git_hub_stats")
+            conn.exec_driver_sql(
+                "INSERT INTO git_hub_stats (username, public_repos, followers, following, total_stars, "
+                "total_forks, most_used_language, last_updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                ('benchmark', 42, 100, 10, 500, 50, 'Python', (now + timedelta(days=365)).strftime(TIMESTAMP))
+            )
+
+        # One public upload for /api/files/<id>
+        portfolio.content_store.store(
+            FileStorage(io.BytesIO(rng.randbytes(args.file_size)), filename='benchmark.pdf'), public=True
+        )
+        print("Deriving tag index and related posts", flush=True)
+        portfolio.tag_index.rebuild()
+        portfolio.related_posts.rebuild()
+        print("Rolling up visitor logs", flush=True)
+        processed = 0
+        while True:
+            count = portfolio.analytics_rollups.update(max_batches=200)
+            processed += count
+            if not count:
+                break
+            print(f"  rolled up {processed}/{args.visitor_logs}", flush=True)
+        db.session.remove()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+    print(f"Seeded {database} in {time.monotonic() - started:.0f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workdir', default='/tmp/portfolio-bench', help="Directory for the throwaway database")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed; the same seed gives the same data")
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--snippets', type=int, default=5000)
+    parser.add_argument('--visitor-logs', type=int, default=100000)
+    parser.add_argument('--log-days', type=int, default=30, help="Visitor logs span this many days up to now")
+    parser.add_argument('--topics', type=int, default=200, help="Distinct subjects posts and snippets are about")
+    parser.add_argument('--inquiries', type=int, default=2000)
+    parser.add_argument('--projects', type=int, default=50)
+    parser.add_argument('--skills', type=int, default=40)
+    parser.add_argument('--certificates', type=int, default=20)
+    parser.add_argument('--file-size', type=int, default=256 * 1024, help="Bytes in the uploaded test file")
+    seed(parser.parse_args(argv))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Bulk import, export and batch changes of admin content.
+
+The admin forms write one row per POST, each with its own commit. Here a
+whole payload is validated first and then written in one transaction:
+the rows of a table go to the database as a single executemany INSERT,
+and a change to many rows (closing fifty inquiries) is one set-based
+UPDATE or DELETE ... WHERE id IN (...). Blog slugs for a whole batch are
+resolved with one query over the slugs already taken.
+
+Core statements bypass the ORM flush hooks that keep derived tables (tag
+index, related posts) in sync, so callers rebuild those once afterwards.
+"""
+import re
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+
+# model: the table; fields: columns exported and imported (besides id);
+# clean: row dict -> validated column dict, raising ValueError (None: not
+# importable); updatable: column -> validator for batch updates; stamp:
+# extra column values every batch update also sets
+BulkDataset = namedtuple('BulkDataset', 'model fields clean updatable stamp', defaults=(None,))
+
+
+class BulkError(ValueError):
+    """The payload was rejected as a whole; nothing was written"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def choice(*allowed):
+    """Batch update validator accepting one of the given values"""
+    def validate(value):
+        if value not in allowed:
+            raise ValueError(f"must be one of {', '.join(map(str, allowed))}")
+        return value
+    return validate
+
+
+def boolean(value):
+    if not isinstance(value, bool):
+        raise ValueError("must be true or false")
+    return value
+
+
+def slugify(text):
+    slug = re.sub(r'[^a-zA-Z0-9\s-]', '', (text or '').lower())
+    return re.sub(r'\s+', '-', slug).strip('-')
+
+
+def unique_slugs(session, column, bases):
+    """A free slug for each base: base, else base-1, base-2, ... (one query)"""
+    bases = [base or 'post' for base in bases]
+    distinct = sorted(set(bases))
+    if not distinct:
+        return []
+    # 'base-...' as a range ('-' sorts just before '.'), so the unique index serves it
+    taken = set(session.execute(select(column).where(or_(
+        column.in_(distinct),
+        *(and_(column > f'{base}-', column < f'{base}.') for base in distinct)
+    ))).scalars())
+    slugs = []
+    for base in bases:
+        slug, counter = base, 1
+        while slug in taken:
+            slug = f"{base}-{counter}"
+            counter += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value) if value else datetime.utcnow()
+    except (TypeError, ValueError):
+        raise ValueError("created_at must be an ISO 8601 timestamp")
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+class BulkData:
+    """Export, import and batch-change the registered datasets"""
+
+    def __init__(self, app=None, db=None, datasets=None):
+        self.max_rows = 5000
+        self.datasets = {}
+        if app is not None:
+            self.init_app(app, db, datasets)
+
+    def init_app(self, app, db, datasets):
+        self.app = app
+        self.db = db
+        self.datasets = datasets
+        self.max_rows = app.config.get('BULK_MAX_ROWS', self.max_rows)
+        app.extensions['bulk_data'] = self
+
+    def _dataset(self, name):
+        if name not in self.datasets:
+            raise BulkError([f"Unknown dataset: {name}"])
+        return self.datasets[name]
+
+    # --- Export ---
+    def export(self, names=None):
+        """{dataset: [row, ...]} with ids, in id order; default: the importable datasets"""
+        data = {}
+        for name in names or [name for name, dataset in self.datasets.items() if dataset.clean is not None]:
+            model = self._dataset(name).model
+            fields = ('id',) + self._dataset(name).fields
+            rows = self.db.session.execute(
+                select(*(getattr(model, field) for field in fields)).order_by(model.id)
+            )
+            data[name] = [dict(zip(fields, map(_plain, row))) for row in rows]
+        return data
+
+    # --- Import ---
+    def import_data(self, payload):
+        """Insert every row of payload ({dataset: [row, ...]}); returns counts.
+
+        Ids in the rows are ignored. Blog slugs are kept where free and
+        suffixed where taken. Raises BulkError listing every invalid row.
+        """
+        if not isinstance(payload, dict):
+            raise BulkError(["Payload must be an object of dataset: [rows]"])
+        errors = []
+        batches = {}
+        for name, rows in payload.items():
+            if name not in self.datasets or self.datasets[name].clean is None:
+                errors.append(f"{name}: not importable")
+                continue
+            if not isinstance(rows, list) or len(rows) > self.max_rows:
+                errors.append(f"{name}: expected a list of at most {self.max_rows} rows")
+                continue
+            dataset = self.datasets[name]
+            cleaned = []
+            for number, row in enumerate(rows, 1):
+                try:
+                    if not isinstance(row, dict):
+                        raise ValueError("row must be an object")
+                    values = dataset.clean(row)
+                    if 'slug' in dataset.fields:
+                        # The wanted slug; made unique against the table when written
+                        values['slug'] = slugify(row.get('slug') or values['title'])
+                    if 'created_at' in dataset.fields:
+                        values['created_at'] = _timestamp(row.get('created_at'))
+                    cleaned.append(values)
+                except ValueError as e:
+                    errors.append(f"{name} row {number}: {e}")
+            batches[name] = cleaned
+        if errors:
+            raise BulkError(errors)
+
+        session = self.db.session
+        try:
+            connection = session.connection()
+            for name, rows in batches.items():
+                model = self.datasets[name].model
+                if not rows:
+                    continue
+                if 'slug' in rows[0]:
+                    bases = [row['slug'] for row in rows]
+                    for row, slug in zip(rows, unique_slugs(session, model.slug, bases)):
+                        row['slug'] = slug
+                # One executemany per table; every row carries the same keys
+                connection.execute(insert(model.__table__), rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return {name: len(rows) for name, rows in batches.items()}
+
+    # --- Batch changes ---
+    def _ids(self, ids):
+        if (not isinstance(ids, list) or not ids or len(ids) > self.max_rows
+                or not all(isinstance(id, int) and not isinstance(id, bool) for id in ids)):
+            raise BulkError([f"ids must be a list of 1 to {self.max_rows} integers"])
+        return sorted(set(ids))
+
+    def update(self, name, ids, values):
+        """Set values on every listed row in one UPDATE; returns rows changed"""
+        dataset = self._dataset(name)
+        ids = self._ids(ids)
+        if not isinstance(values, dict) or not values:
+            raise BulkError(["values must be a non-empty object"])
+        errors = []
+        clean = {}
+        for field, value in values.items():
+            if field not in dataset.updatable:
+                errors.append(f"{field}: not updatable")
+                continue
+            try:
+                clean[field] = dataset.updatable[field](value)
+            except ValueError as e:
+                errors.append(f"{field}: {e}")
+        if errors:
+            raise BulkError(errors)
+        return self._execute(update(dataset.model.__table__)
+                             .where(dataset.model.__table__.c.id.in_(ids)).values(**clean, **(dataset.stamp or {})))
+
+    def delete(self, name, ids):
+        """Delete every listed row in one DELETE; returns rows deleted"""
+        dataset = self._dataset(name)
+        ids = self._ids(ids)
+        return self._execute(delete(dataset.model.__table__).where(dataset.model.__table__.c.id.in_(ids)))
+
+    def _execute(self, stmt):
+        session = self.db.session
+        try:
+            count = session.connection().execute(stmt).rowcount
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return count
@@ -0,0 +1,237 @@
+"""
+Conditional GET support (ETag / Last-Modified) for public pages and APIs.
+
+Every table a response depends on has a row in content_version holding a
+change counter and the time of the last change. SQLite triggers bump it on
+insert, delete and on updates of content columns, so ORM writes, bulk
+statements and manual SQL are all seen. Views declare their tables with
+``@content_versions.conditional(Model, ...)``; the ETag is derived from
+those counters in one small query and a matching If-None-Match (or
+If-Modified-Since) is answered with 304 before the view runs.
+
+HTML pages carry a per-session CSRF token, so their ETag also covers the
+session's token and the window in which an already rendered token is still
+valid; such responses are marked private.
+"""
+import hashlib
+import os
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import g, make_response, request, session
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+VERSION_TABLE = 'content_version'
+
+
+class ContentVersions:
+    """Per-table change counters and the conditional-GET decorator"""
+
+    def __init__(self, app=None, db=None, ignore=None):
+        self.tables = {}
+        self.available = False
+        if app is not None:
+            self.init_app(app, db, ignore)
+
+    def init_app(self, app, db, ignore=None):
+        self.app = app
+        self.db = db
+        # Columns whose updates do not change what is rendered (e.g. counters)
+        self.ignore = {name: set(columns) for name, columns in (ignore or {}).items()}
+        self._salt = None
+        self.salt_paths = []
+        app.extensions['content_versions'] = self
+
+    def depend_on(self, *paths):
+        """Build outputs that rendered pages link to (files or folders); their content salts every ETag"""
+        self.salt_paths.extend(paths)
+        self._salt = None
+
+    @property
+    def salt(self):
+        # A deploy that changes templates or built assets must change every ETag, on every worker alike
+        if self._salt is None:
+            latest = 0
+            template_folder = os.path.join(self.app.root_path, self.app.template_folder or 'templates')
+            for folder, _, files in os.walk(template_folder):
+                for name in files:
+                    latest = max(latest, os.stat(os.path.join(folder, name)).st_mtime_ns)
+            digest = hashlib.sha256(str(latest).encode())
+            for path in self.salt_paths:
+                for file in self._files(path):
+                    digest.update(file.encode())
+                    with open(file, 'rb') as f:
+                        digest.update(f.read())
+            self._salt = digest.hexdigest()[:16]
+        return self._salt
+
+    @staticmethod
+    def _files(path):
+        if os.path.isfile(path):
+            return [path]
+        return sorted(os.path.join(folder, name) for folder, _, files in os.walk(path) for name in files)
+
+    def track(self, *models):
+        for model in models:
+            self.tables[model.__table__.name] = model.__table__
+        return [model.__table__.name for model in models]
+
+    # --- Schema ---
+    def create(self):
+        """Create the version table and the triggers of every tracked table"""
+        try:
+            with self.db.engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+                    "name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0, "
+                    "updated_at TEXT NOT NULL)"
+                )
+                for name, table in self.tables.items():
+                    self._create_triggers(conn, name, table)
+        except OperationalError as e:
+            self.available = False
+            self.app.logger.warning(f"Conditional GET disabled: {e}")
+            return False
+        self.available = True
+        return True
+
+    def detect(self):
+        """Mark conditional GETs usable if 'flask init-db' created the version table"""
+        try:
+            with self.db.engine.connect() as conn:
+                self.available = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': VERSION_TABLE}
+                ).first() is not None
+        except OperationalError:
+            self.available = False
+        if self.available:
+            self.salt  # computed once here rather than on a request, and inherited by forks
+        return self.available
+
+    def _create_triggers(self, conn, name, table):
+        conn.execute(
+            text(f"INSERT OR IGNORE INTO {VERSION_TABLE} (name, version, updated_at) "
+                 "VALUES (:name, 0, strftime('%Y-%m-%d %H:%M:%S', 'now'))"),
+            {'name': name}
+        )
+        bump = (
+            f"UPDATE {VERSION_TABLE} SET version = version + 1, "
+            f"updated_at = strftime('%Y-%m-%d %H:%M:%S', 'now') WHERE name = '{name}';"
+        )
+        watch = ', '.join(
+            column.name for column in table.columns
+            if column.name not in self.ignore.get(name, ())
+        )
+        for suffix, event in (('ai', 'INSERT'), ('ad', 'DELETE'), ('au', f'UPDATE OF {watch}')):
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {name}_version_{suffix} AFTER {event} "
+                f"ON {name} BEGIN {bump} END"
+            )
+
+    def versions(self, names):
+        """{table: (version, updated_at)} for the given tables, one query"""
+        params = {f"name_{i}": name for i, name in enumerate(names)}
+        rows = self.db.session.execute(text(
+            f"SELECT name, version, updated_at FROM {VERSION_TABLE} "
+            f"WHERE name IN ({', '.join(':' + key for key in params)})"
+        ), params).all()
+        return {row.name: (row.version, row.updated_at) for row in rows}
+
+    # --- Request handling ---
+    @staticmethod
+    def applies():
+        # Admin views and pages about to show flash messages are always fresh
+        return (
+            request.method in ('GET', 'HEAD')
+            and not session.get('admin_logged_in')
+            and '_flashes' not in session
+        )
+
+    def _session_part(self):
+        """Session token and token-validity window, for pages embedding a CSRF token"""
+        token = session.get(self.app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+        if not token:
+            return None
+        # A token rendered in this window is still valid for at least half the limit
+        window = max(int(self.app.config.get('WTF_CSRF_TIME_LIMIT') or 3600) // 2, 1)
+        return f"{token}:{int(time.time() // window)}"
+
+    def conditional(self, *models, private=False, before=None):
+        """Decorator answering conditional GETs from the models' versions.
+
+        before(**kwargs) runs on every request, including 304s (e.g.
+        counting a blog view).
+        private=True is for HTML pages that embed the session's CSRF token.
+        """
+        names = self.track(*models)
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if before is not None:
+                    before(**kwargs)
+                if not self.available or not self.applies():
+                    return view(*args, **kwargs)
+
+                try:
+                    versions = self.versions(names)
+                except Exception as e:
+                    self.app.logger.error(f"Content version read error: {e}")
+                    return view(*args, **kwargs)
+                last_modified = self._last_modified(versions)
+                # The page cache keys on this, so a write seen by any worker retires every worker's copy
+                g.content_version = ','.join(f"{name}:{version}" for name, (version, _) in sorted(versions.items()))
+
+                session_part = self._session_part() if private else ''
+                if session_part is not None:
+                    etag = self._etag(versions, session_part)
+                    if self._not_modified(etag, None if private else last_modified):
+                        return self._validators(make_response('', 304), etag, last_modified, private)
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if private:
+                    # Rendering may just have created the session's token
+                    session_part = self._session_part()
+                    if session_part is None:
+                        return response
+                etag = self._etag(versions, session_part)
+                return self._validators(response, etag, last_modified, private)
+            return wrapper
+        return decorator
+
+    def _etag(self, versions, session_part):
+        parts = [self.salt, request.full_path, session_part or '']
+        parts += [f"{name}:{version}" for name, (version, _) in sorted(versions.items())]
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    @staticmethod
+    def _last_modified(versions):
+        stamps = [updated_at for _, updated_at in versions.values() if updated_at]
+        if not stamps:
+            return None
+        return datetime.strptime(max(stamps), '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def _not_modified(etag, last_modified):
+        # If-None-Match wins over If-Modified-Since (RFC 9110 13.2.2)
+        if request.if_none_match:
+            return request.if_none_match.contains(etag)
+        if last_modified is not None and request.if_modified_since:
+            return last_modified <= request.if_modified_since
+        return False
+
+    @staticmethod
+    def _validators(response, etag, last_modified, private):
+        response.set_etag(etag)
+        if private:
+            response.headers['Cache-Control'] = 'private, no-cache'
+        else:
+            response.headers['Cache-Control'] = 'no-cache'
+            if last_modified is not None:
+                response.last_modified = last_modified
+        return response
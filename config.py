@@ -14,11 +14,19 @@ class Config:
         'pool_pre_ping': True,
         'pool_recycle': 300,
     }
+    # SQLite connection tuning (applied on connect, see db_engine.py)
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')  # readers never wait for the writer
+    SQLITE_SYNCHRONOUS = 'NORMAL'  # safe with WAL; fsync only at checkpoints
+    SQLITE_BUSY_TIMEOUT = 5000  # milliseconds to wait for a lock held by another process
+    SQLITE_CACHE_SIZE = -16000  # negative = KiB per connection
+    SQLITE_MMAP_SIZE = 64 * 1024 * 1024  # bytes
+    SQLITE_READ_WRITE_SPLIT = True  # query_only read pool + single serialized writer
+    SQLITE_READ_POOL_SIZE = 4  # read connections per worker process
     
     # Mail configuration
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.getenv('MAIL_PORT', 587))
-    MAIL_USE_TLS = True
+    MAIL_USE_TLS = os.getenv('MAIL_USE_TLS', 'true').lower() == 'true'
     MAIL_USERNAME = os.getenv('MAIL_USERNAME')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
@@ -29,8 +37,8 @@ class Config:
     REDIS_DB = int(os.getenv('REDIS_DB', 0))
     REDIS_PASSWORD = os.getenv('REDIS_PASSWORD')
     
-    # Cache configuration
-    CACHE_TYPE = 'redis'
+    # Cache configuration (full-page cache: lru, sqlite, redis or null)
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'lru')
     CACHE_REDIS_HOST = REDIS_HOST
     CACHE_REDIS_PORT = REDIS_PORT
     CACHE_REDIS_DB = REDIS_DB
@@ -50,7 +58,8 @@ class Config:
     PERMANENT_SESSION_LIFETIME = timedelta(hours=1)
     
     # Rate limiting
-    RATELIMIT_STORAGE_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+    # sqlite:// is shared by all workers on the host (see rate_limit_storage.py)
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', 'sqlite:///instance/rate_limits.db')
     RATELIMIT_DEFAULT = "200 per day;50 per hour"
     
     # Admin credentials
@@ -63,7 +72,7 @@ class Config:
     
     # Analytics
     ANALYTICS_ENABLED = True
-    ANALYTICS_RETENTION_DAYS = 90
+    ANALYTICS_RETENTION_DAYS = int(os.getenv('ANALYTICS_RETENTION_DAYS', 90))
     
     # Performance monitoring
     PERFORMANCE_MONITORING = True
@@ -107,6 +116,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLITE_JOURNAL_MODE = 'MEMORY'
     WTF_CSRF_ENABLED = False
     CACHE_TYPE = 'simple'
 
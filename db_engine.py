@@ -0,0 +1,145 @@
+"""
+SQLite engine layer: connection pragmas, a read pool and a serialized writer.
+
+The database settings (URI, engine options and the SQLITE_* pragmas) are
+read from the Config class selected by FLASK_ENV. For a file database two
+engines are created:
+
+* the default engine is the writer: a pool of one connection whose
+  transactions start with BEGIN IMMEDIATE, so writers queue for the lock
+  up front instead of failing to upgrade a read lock later;
+* the ``read`` bind is a pool of ``query_only`` connections.
+
+RoutingSession sends plain SELECTs to the read pool and everything else
+(flushes, DML, raw connections, and every statement of a transaction that
+has already written) to the writer. In WAL mode readers never wait for the
+writer, so a visitor log flush no longer blocks page rendering.
+"""
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.elements import TextClause
+
+READ_BIND = 'read'
+
+DATABASE_SETTINGS = (
+    'SQLALCHEMY_DATABASE_URI',
+    'SQLALCHEMY_ENGINE_OPTIONS',
+    'SQLITE_JOURNAL_MODE',
+    'SQLITE_SYNCHRONOUS',
+    'SQLITE_BUSY_TIMEOUT',
+    'SQLITE_CACHE_SIZE',
+    'SQLITE_MMAP_SIZE',
+    'SQLITE_READ_POOL_SIZE',
+    'SQLITE_READ_WRITE_SPLIT',
+)
+
+
+def is_file_sqlite(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def configure_database(app, config_class):
+    """Copy the database settings from a Config class and set up the engine pools"""
+    for key in DATABASE_SETTINGS:
+        if hasattr(config_class, key):
+            app.config[key] = getattr(config_class, key)
+
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not is_file_sqlite(uri):
+        return
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    # One writer connection per process; other writers wait for it
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, 'pool_size': 1, 'max_overflow': 0}
+    if app.config.get('SQLITE_READ_WRITE_SPLIT', True):
+        app.config['SQLALCHEMY_BINDS'] = {
+            **app.config.get('SQLALCHEMY_BINDS', {}),
+            READ_BIND: {**options, 'url': uri,
+                        'pool_size': app.config.get('SQLITE_READ_POOL_SIZE', 4), 'max_overflow': 0},
+        }
+
+
+def _is_read(clause):
+    if clause is None:
+        return False
+    if getattr(clause, 'is_select', False):
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip()[:6].upper() == 'SELECT'
+    return False
+
+
+class RoutingSession(Session):
+    """Send reads to the read pool unless this transaction has written"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None:
+            return engine
+        engines = self._db.engines
+        reader = engines.get(READ_BIND)
+        if reader is None or engine is not engines.get(None):
+            return engine
+        if not self._flushing and not self.info.get('wrote') and _is_read(clause):
+            return reader
+        self.info['wrote'] = True
+        return engine
+
+
+def _transaction_ended(session, *args):
+    session.info.pop('wrote', None)
+
+
+class SQLiteTuning:
+    """Apply the SQLITE_* pragmas to every new connection"""
+
+    def __init__(self, app=None, db=None):
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        event.listen(RoutingSession, 'after_commit', _transaction_ended)
+        event.listen(RoutingSession, 'after_rollback', _transaction_ended)
+        with app.app_context():
+            engines = dict(db.engines)
+        for key, engine in engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            event.listen(engine, 'connect', self._pragmas(read_only=key == READ_BIND))
+            if key is None and READ_BIND in engines:
+                self._begin_immediate(engine)
+        app.extensions['sqlite_tuning'] = self
+
+    def _pragmas(self, read_only):
+        config = self.app.config
+        pragmas = [
+            ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'WAL')),
+            ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+            ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT', 5000)),
+            ('cache_size', config.get('SQLITE_CACHE_SIZE', -16000)),
+            ('mmap_size', config.get('SQLITE_MMAP_SIZE', 64 * 1024 * 1024)),
+        ]
+        if read_only:
+            pragmas.append(('query_only', 'ON'))
+
+        def on_connect(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas:
+                if value is not None:
+                    cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+        return on_connect
+
+    @staticmethod
+    def _begin_immediate(engine):
+        # pysqlite's implicit BEGIN is deferred; take the write lock at BEGIN instead
+        @event.listens_for(engine, 'connect')
+        def disable_implicit_begin(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, 'begin')
+        def begin_immediate(connection):
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
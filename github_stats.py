@@ -0,0 +1,213 @@
+"""
+GitHub statistics: fetching and stale-while-revalidate caching.
+
+GitHubFetcher talks to the GitHub REST API over one pooled session, sends
+conditional requests so unchanged resources cost a 304, and follows Link
+pagination with bounded concurrency.
+
+Pages always render from the cached GitHubStats row. When the row is older
+than GITHUB_STATS_MAX_AGE a refresh is started in a background thread;
+a thread lock plus an exclusive lock file make sure only one refresh runs
+at a time across all threads and gunicorn workers.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    """Non-blocking exclusive lock on path; yields whether it was acquired"""
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class GitHubFetcher:
+    """Pooled, conditional and paginated client for the GitHub REST API"""
+
+    def __init__(self, app=None):
+        self.base_url = 'https://api.github.com'
+        self.token = None
+        self.timeout = 10
+        self.concurrency = 4
+        self.requests_sent = 0
+        self.not_modified = 0
+        self._etags = {}
+        self._etag_lock = threading.Lock()
+        self.session = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.base_url = app.config.get('GITHUB_API_URL', self.base_url).rstrip('/')
+        self.token = app.config.get('GITHUB_TOKEN')
+        self.timeout = app.config.get('GITHUB_API_TIMEOUT', self.timeout)
+        self.concurrency = app.config.get('GITHUB_FETCH_CONCURRENCY', self.concurrency)
+        self.session = self._build_session()
+        app.extensions['github_fetcher'] = self
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.concurrency, 1))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'User-Agent': 'Portfolio-Website/1.0',
+            'Accept': 'application/vnd.github+json',
+        })
+        if self.token:
+            session.headers['Authorization'] = f"Bearer {self.token}"
+        return session
+
+    def url(self, path, params=None):
+        url = path if path.startswith(('http://', 'https://')) else f"{self.base_url}{path}"
+        if params:
+            url = f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+        return url
+
+    def get(self, url):
+        """GET url, revalidating with If-None-Match; returns (data, links)"""
+        with self._etag_lock:
+            cached = self._etags.get(url)
+        headers = {'If-None-Match': cached[0]} if cached else {}
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        self.requests_sent += 1
+        if response.status_code == 304 and cached:
+            self.not_modified += 1
+            # A 304 may omit Link, so pagination comes from the cached copy
+            return cached[1], response.links or cached[2]
+        response.raise_for_status()
+
+        data = response.json()
+        etag = response.headers.get('ETag')
+        if etag:
+            with self._etag_lock:
+                self._etags[url] = (etag, data, response.links)
+        return data, response.links
+
+    def get_json(self, path, params=None):
+        return self.get(self.url(path, params))[0]
+
+    def get_paginated(self, path, params=None):
+        """Fetch every page of a list endpoint and return the combined items"""
+        first_url = self.url(path, params)
+        items, links = self.get(first_url)
+        if not isinstance(items, list):
+            raise ValueError(f"Expected a list from {first_url}")
+        items = list(items)
+
+        last = links.get('last', {}).get('url')
+        if last:
+            # Page count is known up front: fetch the rest concurrently
+            page_urls = self._page_urls(last)
+            with ThreadPoolExecutor(max_workers=max(self.concurrency, 1)) as pool:
+                for page in pool.map(lambda page_url: self.get(page_url)[0], page_urls):
+                    items.extend(page)
+            return items
+
+        # No rel="last": walk rel="next" one page at a time
+        next_url = links.get('next', {}).get('url')
+        while next_url:
+            page, links = self.get(next_url)
+            items.extend(page)
+            next_url = links.get('next', {}).get('url')
+        return items
+
+    def _page_urls(self, last_url):
+        parts = urlparse(last_url)
+        query = parse_qs(parts.query)
+        last_page = int(query.get('page', ['1'])[0])
+        urls = []
+        for page in range(2, last_page + 1):
+            query['page'] = [str(page)]
+            urls.append(urlunparse(parts._replace(query=urlencode(query, doseq=True))))
+        return urls
+
+
+class GitHubStatsRefresher:
+    """Refresh GitHubStats in the background, at most once at a time"""
+
+    def __init__(self, app=None, model=None, refresh_func=None):
+        self.max_age = timedelta(hours=1)
+        self.retry_interval = 300
+        self.lock_path = None
+        self.refreshes = 0
+        self._thread_lock = threading.Lock()
+        self._next_attempt = 0
+        if app is not None:
+            self.init_app(app, model, refresh_func)
+
+    def init_app(self, app, model, refresh_func):
+        self.app = app
+        self.model = model
+        self.refresh_func = refresh_func
+        self.max_age = timedelta(seconds=app.config.get('GITHUB_STATS_MAX_AGE', 3600))
+        self.retry_interval = app.config.get('GITHUB_STATS_RETRY_INTERVAL', self.retry_interval)
+        self.lock_path = app.config.get('GITHUB_STATS_LOCK_FILE') or os.path.join(
+            app.instance_path, 'github_stats.lock'
+        )
+        app.extensions['github_stats_refresher'] = self
+
+    def is_stale(self, stats):
+        return stats is None or stats.last_updated < datetime.utcnow() - self.max_age
+
+    def refresh_if_stale(self, stats):
+        """Start a background refresh if stats is missing or too old"""
+        if not self.is_stale(stats):
+            return False
+        return self.trigger()
+
+    def trigger(self):
+        # Back off after every attempt so a failing API is not hammered
+        if time.monotonic() < self._next_attempt:
+            return False
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        self._next_attempt = time.monotonic() + self.retry_interval
+        try:
+            threading.Thread(target=self._run, name='github-stats-refresh', daemon=True).start()
+        except Exception:
+            self._thread_lock.release()
+            raise
+        return True
+
+    def _run(self):
+        try:
+            with self.app.app_context():
+                with file_lock(self.lock_path) as acquired:
+                    if not acquired:
+                        return
+                    # Another worker may have finished a refresh just before us
+                    if not self.is_stale(self.model.query.first()):
+                        return
+                    self.refresh_func()
+                    self.refreshes += 1
+        except Exception as e:
+            self.app.logger.error(f"Background GitHub stats refresh failed: {e}")
+        finally:
+            self._thread_lock.release()
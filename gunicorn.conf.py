@@ -1,5 +1,8 @@
 import os
 
+# Application
+wsgi_app = "app:create_app()"
+
 # Server socket
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
 backlog = 2048
@@ -25,7 +28,7 @@ access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
 proc_name = "portfolio-app"
 
 # Server mechanics
-preload_app = False  # Disable preloading to avoid initialization issues
+preload_app = True  # Import once in the master; workers fork ready to serve (run 'flask init-db' first)
 daemon = False
 pidfile = None
 user = None
@@ -33,4 +36,21 @@ group = None
 tmp_upload_dir = None
 
 # Graceful timeout
-graceful_timeout = 30
\ No newline at end of file
+graceful_timeout = 30
+
+# Server hooks
+def post_fork(server, worker):
+    """Drop database connections inherited from the master without closing them"""
+    from app import app, db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+def worker_exit(server, worker):
+    """Flush buffered visitor logs and view counts before the worker goes away"""
+    try:
+        from app import visitor_log_buffer, view_counter
+        visitor_log_buffer.shutdown()
+        view_counter.shutdown()
+    except Exception as e:
+        server.log.error(f"Buffer flush on exit failed: {e}")
\ No newline at end of file
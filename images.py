@@ -0,0 +1,217 @@
+"""
+Responsive image variants.
+
+``generate()`` re-encodes an image as WebP and JPEG at each configured
+width up to its own (IMAGE_WIDTHS), into a directory named after the
+source's content hash:
+
+    static/variants/<sha256[:16]>/<width>.webp | .jpg
+
+An unchanged source is never re-encoded, whatever it is called. A small
+JSON record per source key (a static path such as ``img/vishal.jpeg``)
+points at the current hash, so templates can emit ``srcset`` without
+reading the image:
+
+    {{ responsive_image('img/vishal.jpeg', alt='...', sizes='(min-width: 768px) 40vw, 100vw') }}
+
+renders a <picture> whose WebP and JPEG srcsets let the browser pick the
+smallest file that fills the slot; without variants it is a plain <img>.
+Variants are built by ``flask build-images`` for static/ and can be made
+for uploads as they arrive. Encoding needs Pillow; without it nothing is
+generated and images are served as they are.
+"""
+import hashlib
+import json
+import os
+import threading
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}  # not GIF: variants would lose animation
+# Output format -> (file extension, MIME type)
+FORMATS = {'webp': ('.webp', 'image/webp'), 'jpeg': ('.jpg', 'image/jpeg')}
+KEYS_DIR = 'keys'
+
+
+class ResponsiveImages:
+    """Generate width-bucketed variants and render srcset markup for them"""
+
+    def __init__(self, app=None):
+        self.widths = (320, 640, 960, 1280)
+        self.quality = 80
+        self.folder = 'variants'
+        self._records = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.widths = tuple(sorted(app.config.get('IMAGE_WIDTHS', self.widths)))
+        self.quality = app.config.get('IMAGE_QUALITY', self.quality)
+        self.folder = app.config.get('IMAGE_VARIANTS_DIR', self.folder)
+        app.add_template_global(self.responsive_image, 'responsive_image')
+        app.extensions['responsive_images'] = self
+
+    @staticmethod
+    def available():
+        return Image is not None
+
+    @property
+    def root(self):
+        return os.path.join(self.app.static_folder, self.folder)
+
+    @property
+    def records_folder(self):
+        return os.path.join(self.root, KEYS_DIR)
+
+    def _record_path(self, key):
+        return os.path.join(self.records_folder, hashlib.sha1(key.encode()).hexdigest() + '.json')
+
+    # --- Generation ---
+    def generate(self, source, key):
+        """Variants of the image file source, recorded under key; None without Pillow"""
+        if Image is None:
+            return None
+        with open(source, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        record = self.record(key)
+        if record is not None and record['hash'] == digest:
+            return record
+
+        directory = os.path.join(self.root, digest)
+        with Image.open(source) as image:
+            # Honour camera rotation; variants carry no EXIF
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA', 'L'):
+                image = image.convert('RGBA')
+            width, height = image.size
+            widths = sorted({w for w in self.widths if w < width} | {min(width, self.widths[-1])})
+            variants = {fmt: [] for fmt in FORMATS}
+            for target in widths:
+                resized = image if target == width else image.resize(
+                    (target, max(1, round(height * target / width))), Image.LANCZOS
+                )
+                for fmt, (ext, _) in FORMATS.items():
+                    name = f"{target}{ext}"
+                    path = os.path.join(directory, name)
+                    if not os.path.exists(path):
+                        self._save(resized, path, fmt)
+                    variants[fmt].append([target, f"{self.folder}/{digest}/{name}"])
+
+        record = {'hash': digest, 'width': width, 'height': height, 'variants': variants}
+        self._write(self._record_path(key), json.dumps(record).encode())
+        with self._lock:
+            self._records[key] = record
+        return record
+
+    def _save(self, image, path, fmt):
+        if fmt == 'jpeg' and image.mode == 'RGBA':
+            # JPEG has no alpha: flatten onto white
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        options = {'quality': self.quality}
+        if fmt == 'webp':
+            options['method'] = 6
+        else:
+            options.update(optimize=True, progressive=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        image.save(temporary, format=fmt.upper(), **options)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _write(path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            f.write(content)
+        os.replace(temporary, path)
+
+    def build(self, prune=True):
+        """Variants for every image under the static folder; returns the keys built"""
+        built = []
+        root = self.app.static_folder
+        skip = {self.folder, os.path.relpath(self.app.config.get('UPLOAD_FOLDER', 'static/uploads'), 'static'),
+                self.app.config.get('ASSETS_DIST_DIR', 'dist')}
+        for directory, subdirectories, files in os.walk(root):
+            relative = os.path.relpath(directory, root)
+            subdirectories[:] = sorted(
+                name for name in subdirectories if os.path.normpath(os.path.join(relative, name)) not in skip
+            )
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                    key = os.path.normpath(os.path.join(relative, name)).replace(os.sep, '/')
+                    if self.generate(os.path.join(directory, name), key) is not None:
+                        built.append(key)
+        if prune:
+            self.prune()
+        return built
+
+    def prune(self):
+        """Delete variant directories no key record points at any more"""
+        keys = self.records_folder
+        if not os.path.isdir(keys):
+            return 0
+        referenced = set()
+        for name in os.listdir(keys):
+            if name.endswith('.json'):
+                with open(os.path.join(keys, name)) as f:
+                    referenced.add(json.load(f)['hash'])
+        removed = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name != KEYS_DIR and os.path.isdir(path) and name not in referenced:
+                for file in os.listdir(path):
+                    os.remove(os.path.join(path, file))
+                os.rmdir(path)
+                removed += 1
+        return removed
+
+    # --- Rendering ---
+    def record(self, key):
+        """The variant record of key, or None; cached per process once found"""
+        record = self._records.get(key)
+        if record is not None:
+            return record
+        try:
+            with open(self._record_path(key)) as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.app.logger.error(f"Unreadable image variant record for {key}: {e}")
+            return None
+        with self._lock:
+            self._records[key] = record
+        return record
+
+    def srcset(self, key, fmt='jpeg'):
+        record = self.record(key)
+        if record is None:
+            return ''
+        return ', '.join(f"{url_for('static', filename=path)} {width}w" for width, path in record['variants'][fmt])
+
+    def responsive_image(self, filename, alt='', sizes='100vw', **attrs):
+        """<picture> with WebP and JPEG srcsets for a static image, else a plain <img>"""
+        record = self.record(filename)
+        attributes = ''.join(f' {escape(name.rstrip("_").replace("_", "-"))}="{escape(value)}"'
+                             for name, value in attrs.items())
+        if record is None:
+            return Markup(f'<img src="{escape(url_for("static", filename=filename))}" alt="{escape(alt)}"{attributes}>')
+        largest = record['variants']['jpeg'][-1][1]
+        return Markup(
+            # display: contents keeps the <img> sized by its container as before
+            f'<picture style="display: contents"><source type="{FORMATS["webp"][1]}" srcset="{escape(self.srcset(filename, "webp"))}" '
+            f'sizes="{escape(sizes)}">'
+            f'<img src="{escape(url_for("static", filename=largest))}" srcset="{escape(self.srcset(filename))}" '
+            f'sizes="{escape(sizes)}" width="{record["width"]}" height="{record["height"]}" '
+            f'alt="{escape(alt)}"{attributes}></picture>'
+        )
@@ -0,0 +1,120 @@
+"""
+Keyset (cursor) pagination, newest first.
+
+``paginate()`` orders a query by key columns such as ``(created_at, id)``
+and continues after the last row a client has seen with
+``WHERE (created_at, id) < (:created_at, :id)``. With an index on the key
+columns every page costs the same, where OFFSET re-reads every row before
+the page. The cursor handed to clients is an opaque URL-safe token that
+encodes the direction and the boundary row's keys.
+
+Totals are optional: a COUNT per distinct filter is cached for
+KEYSET_COUNT_TTL seconds, so they are exact at most that long ago.
+"""
+import base64
+import binascii
+import json
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import literal, tuple_
+
+KeysetPage = namedtuple('KeysetPage', 'items per_page next_cursor prev_cursor total')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPaginator:
+    """Cursor pagination plus a small cache of approximate totals"""
+
+    def __init__(self, app=None):
+        self.count_ttl = 60
+        self.max_counts = 256
+        self._counts = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.count_ttl = app.config.get('KEYSET_COUNT_TTL', self.count_ttl)
+        app.extensions['keyset_paginator'] = self
+
+    # --- Cursors ---
+    @staticmethod
+    def encode(direction, values):
+        payload = [direction] + [value.isoformat() if isinstance(value, datetime) else value for value in values]
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode(cursor, order):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            direction, values = payload[0], payload[1:]
+            if direction not in ('next', 'prev') or len(values) != len(order):
+                raise InvalidCursor(cursor)
+            decoded = []
+            for column, value in zip(order, values):
+                if column.type.python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif not isinstance(value, column.type.python_type):
+                    raise InvalidCursor(cursor)
+                decoded.append(value)
+            return direction, decoded
+        except (ValueError, TypeError, IndexError, binascii.Error, NotImplementedError) as e:
+            raise InvalidCursor(cursor) from e
+
+    # --- Paging ---
+    def paginate(self, query, order, cursor=None, per_page=20, count_key=None):
+        """One page of query, newest first by the order columns.
+
+        An invalid cursor raises InvalidCursor. count_key names the filter
+        for the cached total; None skips the total.
+        """
+        direction, values = self.decode(cursor, order) if cursor else ('next', None)
+        backwards = direction == 'prev'
+        total = self.total(count_key, query) if count_key is not None else None
+
+        if values is not None:
+            keys = tuple_(*order)
+            boundary = tuple_(*(literal(value, column.type) for column, value in zip(order, values)))
+            query = query.filter(keys > boundary if backwards else keys < boundary)
+        ordering = [column.asc() if backwards else column.desc() for column in order]
+        rows = query.order_by(None).order_by(*ordering).limit(per_page + 1).all()
+        more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backwards:
+            rows.reverse()
+
+        # Arriving from the other side proves a page exists there
+        has_next = more if not backwards else values is not None
+        has_prev = more if backwards else values is not None
+        next_cursor = prev_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode('next', [getattr(rows[-1], column.key) for column in order])
+        if rows and has_prev:
+            prev_cursor = self.encode('prev', [getattr(rows[0], column.key) for column in order])
+        return KeysetPage(rows, per_page, next_cursor, prev_cursor, total)
+
+    def total(self, key, query):
+        """Row count of query, cached per key for count_ttl seconds"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        count = query.order_by(None).count()
+        with self._lock:
+            if len(self._counts) >= self.max_counts:
+                self._counts.clear()
+            self._counts[key] = (now + self.count_ttl, count)
+        return count
+
+    def invalidate(self, prefix=''):
+        """Forget cached totals whose key starts with prefix (after writes)"""
+        with self._lock:
+            for key in [key for key in self._counts if str(key).startswith(prefix)]:
+                del self._counts[key]
@@ -0,0 +1,225 @@
+"""
+Persistent outbound mail queue.
+
+Requests never talk to SMTP: they add an outbox row in the same transaction
+as the data it is about and return. A background sender in each worker
+claims due rows, delivers them over one SMTP connection per drain pass and
+retries failures with exponential backoff. Claiming pushes a row's
+next_attempt_at forward (a lease), so concurrent workers never send the
+same message twice and a message claimed by a crashed worker is retried
+once the lease runs out. Sent rows are deleted once they are older than
+MAIL_OUTBOX_KEEP_SENT_DAYS; failed rows stay for inspection.
+
+Point MAIL_SERVER / MAIL_PORT at a local sink (e.g. ``python -m aiosmtpd -n
+-l localhost:1025`` with MAIL_USE_TLS=false) to exercise it.
+"""
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask_mail import Message
+from sqlalchemy import delete, func, select, update
+
+
+class MailOutbox:
+    """Queue messages in the database and deliver them in the background"""
+
+    def __init__(self, app=None, db=None, mail=None, model=None):
+        self.poll_interval = 30.0
+        self.batch_size = 20
+        self.max_attempts = 8
+        self.backoff = 30
+        self.max_backoff = 3600
+        self.lease = 300
+        self.keep_sent_days = 7
+        self.prune_interval = 3600
+        self.sent = 0
+        self._last_prune = 0.0
+        self._wake = threading.Event()
+        self._start_lock = threading.Lock()
+        self._pid = None
+        if app is not None:
+            self.init_app(app, db, mail, model)
+
+    def init_app(self, app, db, mail, model):
+        self.app = app
+        self.db = db
+        self.mail = mail
+        self.model = model
+        self.poll_interval = app.config.get('MAIL_OUTBOX_POLL_INTERVAL', self.poll_interval)
+        self.batch_size = app.config.get('MAIL_OUTBOX_BATCH_SIZE', self.batch_size)
+        self.max_attempts = app.config.get('MAIL_OUTBOX_MAX_ATTEMPTS', self.max_attempts)
+        self.backoff = app.config.get('MAIL_OUTBOX_BACKOFF', self.backoff)
+        self.max_backoff = app.config.get('MAIL_OUTBOX_MAX_BACKOFF', self.max_backoff)
+        self.lease = app.config.get('MAIL_OUTBOX_LEASE', self.lease)
+        self.keep_sent_days = app.config.get('MAIL_OUTBOX_KEEP_SENT_DAYS', self.keep_sent_days)
+        # Messages left by an earlier process are picked up on the first request
+        app.before_request(self._ensure_worker)
+        app.extensions['mail_outbox'] = self
+
+    def enqueue(self, subject, recipients, body, sender=None):
+        """Add a message to the current session; it is sent once committed"""
+        recipients = [recipient for recipient in recipients if recipient]
+        if not recipients:
+            # Mail is not configured; whatever is being saved must still be saved
+            self.app.logger.warning(f"Mail outbox: no recipients for '{subject}', not queued")
+            return None
+        message = self.model(
+            subject=subject,
+            sender=sender or self.app.config.get('MAIL_DEFAULT_SENDER') or self.app.config.get('MAIL_USERNAME'),
+            recipients=', '.join(recipients),
+            body=body,
+        )
+        self.db.session.add(message)
+        return message
+
+    def wake(self):
+        """Ask the sender to deliver now instead of at its next poll"""
+        self._ensure_worker()
+        self._wake.set()
+
+    # --- Delivery ---
+    def send_pending(self):
+        """Deliver every due message; returns the number sent"""
+        sent = 0
+        with self.app.app_context():
+            while True:
+                batch = self._claim()
+                if not batch:
+                    break
+                sent += self._deliver(batch)
+                if len(batch) < self.batch_size:
+                    break
+        self.sent += sent
+        return sent
+
+    def _claim(self):
+        table = self.model.__table__
+        now = datetime.utcnow()
+        due = (
+            select(table.c.id)
+            .where(table.c.status == 'pending', table.c.next_attempt_at <= now)
+            .order_by(table.c.id)
+            .limit(self.batch_size)
+        )
+        try:
+            rows = self.db.session.execute(
+                update(table)
+                .where(table.c.id.in_(due))
+                .values(next_attempt_at=now + timedelta(seconds=self.lease), attempts=table.c.attempts + 1)
+                .returning(table.c.id, table.c.subject, table.c.sender, table.c.recipients,
+                           table.c.body, table.c.attempts)
+            ).all()
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            self.app.logger.error(f"Mail outbox claim error: {e}")
+            return []
+        return sorted(rows, key=lambda row: row.id)
+
+    def _deliver(self, batch):
+        sent = 0
+        pending = list(batch)
+        error = 'not attempted: SMTP connection lost'
+        try:
+            # One SMTP session for the whole batch
+            with self.mail.connect() as connection:
+                while pending:
+                    row = pending.pop(0)
+                    try:
+                        connection.send(Message(
+                            subject=row.subject,
+                            sender=row.sender,
+                            recipients=[r.strip() for r in row.recipients.split(',') if r.strip()],
+                            body=row.body,
+                        ))
+                    except (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError) as e:
+                        # The connection is gone: this and the rest of the batch retry later
+                        self._failed(row, e)
+                        break
+                    except Exception as e:
+                        self._failed(row, e)
+                    else:
+                        self._mark(row.id, status='sent', sent_at=datetime.utcnow(), last_error=None)
+                        sent += 1
+        except Exception as e:
+            error = e
+            self.app.logger.error(f"Mail outbox SMTP error: {e}")
+        for row in pending:
+            self._failed(row, error)
+        return sent
+
+    def _failed(self, row, error):
+        if row.attempts >= self.max_attempts:
+            self.app.logger.error(f"Mail outbox giving up on message {row.id}: {error}")
+            self._mark(row.id, status='failed', last_error=str(error)[:500])
+            return
+        delay = min(self.backoff * 2 ** (row.attempts - 1), self.max_backoff)
+        self._mark(row.id, next_attempt_at=datetime.utcnow() + timedelta(seconds=delay),
+                   last_error=str(error)[:500])
+
+    def _mark(self, message_id, **values):
+        table = self.model.__table__
+        try:
+            self.db.session.execute(update(table).where(table.c.id == message_id).values(**values))
+            self.db.session.commit()
+        except Exception as e:
+            self.db.session.rollback()
+            self.app.logger.error(f"Mail outbox update error: {e}")
+
+    def prune(self, batch_size=500):
+        """Delete sent messages older than keep_sent_days; returns rows deleted"""
+        table = self.model.__table__
+        cutoff = datetime.utcnow() - timedelta(days=self.keep_sent_days)
+        deleted = 0
+        with self.app.app_context():
+            while True:
+                # Small batches keep the write lock short
+                old = (
+                    select(table.c.id)
+                    .where(table.c.status == 'sent', table.c.sent_at < cutoff)
+                    .limit(batch_size)
+                )
+                try:
+                    count = self.db.session.execute(delete(table).where(table.c.id.in_(old))).rowcount
+                    self.db.session.commit()
+                except Exception as e:
+                    self.db.session.rollback()
+                    self.app.logger.error(f"Mail outbox prune error: {e}")
+                    break
+                deleted += count
+                if count < batch_size:
+                    break
+        return deleted
+
+    def stats(self):
+        counts = dict(self.db.session.execute(
+            select(self.model.status, func.count()).group_by(self.model.status)
+        ).all())
+        return {'pending': counts.get('pending', 0), 'failed': counts.get('failed', 0), 'sent_by_worker': self.sent}
+
+    # --- Background sender ---
+    def _ensure_worker(self):
+        # One sender thread per worker process
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._wake = threading.Event()
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='mail-outbox-sender', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.send_pending()
+                if time.monotonic() - self._last_prune >= self.prune_interval:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception as e:
+                self.app.logger.error(f"Mail outbox sender error: {e}")
@@ -0,0 +1,94 @@
+"""
+In-place schema migrations for existing databases.
+
+``db.create_all()`` only creates missing tables; it never touches a table
+that already exists, so indexes or columns added to a model later never
+reach a database created before them. Schema changes are therefore also
+registered here as named steps:
+
+    @schema_migrations.migration('0001_hot_path_indexes')
+    def add_hot_path_indexes(conn):
+        create_indexes(conn, BlogPost, VisitorLog)
+
+``upgrade()`` runs every step not yet recorded in the schema_migration
+table, in registration order, each in its own transaction. Steps must be
+idempotent (e.g. ``CREATE INDEX IF NOT EXISTS``) because on a fresh
+database create_all() has usually done the work already.
+"""
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import OperationalError
+
+MIGRATION_TABLE = 'schema_migration'
+
+
+def create_indexes(conn, *models):
+    """Create every index the models declare that the database lacks"""
+    created = []
+    existing = set(inspect(conn).get_table_names())
+    for model in models:
+        table = getattr(model, '__table__', model)
+        if table.name not in existing:
+            continue  # create_all() will create the table with its indexes
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            index.create(conn, checkfirst=True)
+            created.append(index.name)
+    return created
+
+
+class SchemaMigrations:
+    """Named, recorded schema changes applied in order"""
+
+    def __init__(self, app=None, db=None):
+        self.steps = []
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        app.extensions['schema_migrations'] = self
+
+    def migration(self, name):
+        """Register a step; it receives a Connection inside a transaction"""
+        def decorator(step):
+            if any(existing == name for existing, _ in self.steps):
+                raise ValueError(f"Duplicate migration name: {name}")
+            self.steps.append((name, step))
+            return step
+        return decorator
+
+    def applied(self):
+        try:
+            with self.db.engine.connect() as conn:
+                return {row[0] for row in conn.execute(text(f"SELECT name FROM {MIGRATION_TABLE}"))}
+        except OperationalError:
+            # No migration table yet: nothing has been applied
+            return set()
+
+    def pending(self):
+        applied = self.applied()
+        return [name for name, _ in self.steps if name not in applied]
+
+    def upgrade(self):
+        """Apply every pending step; returns the names applied"""
+        with self.db.engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE TABLE IF NOT EXISTS {MIGRATION_TABLE} ("
+                "name TEXT PRIMARY KEY, applied_at TEXT NOT NULL)"
+            )
+        applied = self.applied()
+        done = []
+        for name, step in self.steps:
+            if name in applied:
+                continue
+            with self.db.engine.begin() as conn:
+                step(conn)
+                conn.execute(
+                    text(f"INSERT INTO {MIGRATION_TABLE} (name, applied_at) VALUES (:name, :applied_at)"),
+                    {'name': name, 'applied_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')}
+                )
+            self.app.logger.info(f"Applied migration {name}")
+            done.append(name)
+        return done
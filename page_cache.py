@@ -0,0 +1,288 @@
+"""
+Full-page response cache for anonymous public pages.
+
+Views opt in with ``@page_cache.cached(group)``. Entries are keyed by
+``page:<group>:<path>?<sorted query>#<content versions>`` so an admin
+write can invalidate exactly the groups it affects with a prefix delete.
+The content versions (set by an outer ``@content_versions.conditional``)
+make a write visible to every worker, even where that delete only reached
+the worker that handled it. Backends:
+
+* ``lru``    - in-process LRU (per worker; fastest, default)
+* ``sqlite`` - a local SQLite file shared by all workers on the host
+* ``redis``  - a Redis server (needs the optional ``redis`` package)
+* ``null``   - caching disabled
+
+Cached HTML never contains a CSRF token: it is rendered with a placeholder
+that is replaced with the visitor's own token on every response.
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import Response, g, request, session
+from flask_wtf.csrf import generate_csrf
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+CSRF_PLACEHOLDER = '__PAGE_CACHE_CSRF_TOKEN__'
+
+
+class NullBackend:
+    def get(self, key):
+        return None
+
+    def set(self, key, value, timeout):
+        pass
+
+    def delete_prefix(self, prefix):
+        return 0
+
+    def clear(self):
+        pass
+
+
+class LRUBackend:
+    """Bounded in-memory LRU with per-entry expiry"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.time() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """Cache table in a separate SQLite file, shared across workers"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            # Opened on first use, so importing the app does no I/O
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS page_cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM page_cache WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, timeout):
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO page_cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, time.time() + timeout)
+        )
+        # Opportunistically drop expired rows so the file stays small
+        if hash(key) % 64 == 0:
+            conn.execute("DELETE FROM page_cache WHERE expires <= ?", (time.time(),))
+
+    def delete_prefix(self, prefix):
+        # Range predicate so the primary-key index is used
+        return self._connect().execute(
+            "DELETE FROM page_cache WHERE key >= ? AND key < ?", (prefix, prefix + '\uffff')
+        ).rowcount
+
+    def clear(self):
+        self._connect().execute("DELETE FROM page_cache")
+
+
+class RedisBackend:
+    def __init__(self, host, port, db=0, password=None):
+        if redis is None:
+            raise RuntimeError("CACHE_TYPE 'redis' requires the redis package")
+        self.client = redis.Redis(host=host, port=port, db=db, password=password)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, timeout):
+        self.client.set(key, value, ex=int(timeout))
+
+    def delete_prefix(self, prefix):
+        pattern = ''.join(f'[{c}]' if c in '*?[]' else c for c in prefix) + '*'
+        deleted = 0
+        batch = []
+        for key in self.client.scan_iter(match=pattern, count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                deleted += self.client.delete(*batch)
+                batch = []
+        if batch:
+            deleted += self.client.delete(*batch)
+        return deleted
+
+    def clear(self):
+        self.delete_prefix('page:')
+
+
+class PageCache:
+    """Cache rendered public pages and invalidate them by group"""
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.timeout = 300
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', self.timeout)
+        self.backend = self._create_backend(app)
+        # Let templates emit a placeholder instead of a per-session token.
+        # Flask-WTF sets both a global and a context processor; ours runs later.
+        app.jinja_env.globals['csrf_token'] = self._csrf_token
+        app.context_processor(lambda: {'csrf_token': self._csrf_token})
+        app.extensions['page_cache'] = self
+
+    def _create_backend(self, app):
+        cache_type = (app.config.get('CACHE_TYPE') or 'lru').lower()
+        if cache_type in ('lru', 'simple'):
+            return LRUBackend(app.config.get('CACHE_LRU_MAX_ENTRIES', 512))
+        if cache_type == 'sqlite':
+            path = app.config.get('CACHE_SQLITE_PATH') or os.path.join(app.instance_path, 'page_cache.db')
+            return SQLiteBackend(path)
+        if cache_type == 'redis':
+            try:
+                return RedisBackend(
+                    app.config.get('CACHE_REDIS_HOST', 'localhost'),
+                    app.config.get('CACHE_REDIS_PORT', 6379),
+                    app.config.get('CACHE_REDIS_DB', 0),
+                    app.config.get('CACHE_REDIS_PASSWORD'),
+                )
+            except RuntimeError as e:
+                app.logger.warning(f"{e}; falling back to the in-process cache")
+                return LRUBackend(app.config.get('CACHE_LRU_MAX_ENTRIES', 512))
+        return NullBackend()
+
+    @staticmethod
+    def _csrf_token():
+        if g.get('page_cache_capture'):
+            return CSRF_PLACEHOLDER
+        return generate_csrf()
+
+    @staticmethod
+    def key(group):
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return f"page:{group}:{request.path}?{query}#{g.get('content_version', '')}"
+
+    @staticmethod
+    def cacheable():
+        """Only anonymous GETs without pending flash messages are cached"""
+        return (
+            request.method in ('GET', 'HEAD')
+            and not session.get('admin_logged_in')
+            and '_flashes' not in session
+        )
+
+    def cached(self, group):
+        """Decorator; group is a name or a callable taking the view kwargs"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self.cacheable():
+                    return view(*args, **kwargs)
+
+                key = self.key(group(**kwargs) if callable(group) else group)
+                try:
+                    cached = self.backend.get(key)
+                except Exception as e:
+                    self.app.logger.error(f"Page cache read error: {e}")
+                    cached = None
+                if cached is not None:
+                    self.hits += 1
+                    return self._response(cached, 'HIT')
+
+                self.misses += 1
+                g.page_cache_capture = True
+                try:
+                    response = self.app.make_response(view(*args, **kwargs))
+                finally:
+                    g.page_cache_capture = False
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+
+                payload = response.mimetype.encode() + b'\n' + response.get_data()
+                try:
+                    self.backend.set(key, payload, self.timeout)
+                except Exception as e:
+                    self.app.logger.error(f"Page cache write error: {e}")
+                return self._response(payload, 'MISS')
+            return wrapper
+        return decorator
+
+    def _response(self, payload, status):
+        mimetype, body = bytes(payload).split(b'\n', 1)
+        if CSRF_PLACEHOLDER.encode() in body:
+            body = body.replace(CSRF_PLACEHOLDER.encode(), generate_csrf().encode())
+        response = Response(body, mimetype=mimetype.decode())
+        response.headers['X-Cache'] = status
+        return response
+
+    def invalidate(self, *groups):
+        """Drop every cached page of the given groups"""
+        deleted = 0
+        for group in groups:
+            try:
+                deleted += self.backend.delete_prefix(f"page:{group}:")
+            except Exception as e:
+                self.app.logger.error(f"Page cache invalidation error: {e}")
+        return deleted
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        return {'backend': type(self.backend).__name__, 'hits': self.hits, 'misses': self.misses}
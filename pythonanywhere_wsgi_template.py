@@ -38,8 +38,9 @@ from dotenv import load_dotenv
 project_folder = os.path.expanduser(project_home)
 load_dotenv(os.path.join(project_folder, '.env'))
 
-# Import Flask app
-from app import app as application
+# Import Flask app (run 'flask --app app init-db' in a console once before the first start)
+from app import create_app
+application = create_app()
 
 # Optional: Set up logging
 import logging
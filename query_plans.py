@@ -0,0 +1,89 @@
+"""
+EXPLAIN QUERY PLAN check for the statements each route issues.
+
+The check requests a list of paths through the test client, records every
+SELECT/UPDATE/DELETE the app sends to SQLite while doing so, and asks
+SQLite for the plan of each distinct statement. A statement fails when its
+plan scans a whole table without an index although the statement filters
+(WHERE) or sorts (ORDER BY through a temporary B-tree). A plain read of a
+whole table (``Skill.query.all()``) is not a missing index and passes.
+
+Requests go to the configured database and behave like real visits (the
+visitor log records them); point DATABASE_URL at a copy to keep them out.
+"""
+import re
+from collections import namedtuple
+
+from sqlalchemy import event
+
+PlanProblem = namedtuple('PlanProblem', 'path statement plan reason')
+
+_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)\b(?! USING| VIRTUAL TABLE)')
+_WHERE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+_CHECKED = ('SELECT', 'UPDATE', 'DELETE')
+
+
+class QueryPlanChecker:
+    """Run paths through the app and explain the queries they issue"""
+
+    def __init__(self, app=None, db=None, allow_scan=()):
+        self.allow_scan = set(allow_scan)
+        self._current = None
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        app.extensions['query_plan_checker'] = self
+
+    def check(self, paths, admin_paths=()):
+        """List of PlanProblem for the statements behind the given paths"""
+        statements = {}
+        with self.app.app_context():
+            engines = list(self.db.engines.values())
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip()[:6].upper() in _CHECKED:
+                statements.setdefault((self._current, statement), parameters)
+
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', record)
+        try:
+            client = self.app.test_client()
+            for path in paths:
+                self._current = path
+                client.get(path)
+            with client.session_transaction() as session:
+                session['admin_logged_in'] = True
+            for path in admin_paths:
+                self._current = path
+                client.get(path)
+        finally:
+            for engine in engines:
+                event.remove(engine, 'before_cursor_execute', record)
+
+        problems = []
+        seen = set()
+        with self.app.app_context(), self.db.engine.connect() as conn:
+            for (path, statement), parameters in statements.items():
+                if statement in seen:
+                    continue
+                seen.add(statement)
+                plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                reason = self.problem(statement, plan)
+                if reason:
+                    problems.append(PlanProblem(path, statement, plan, reason))
+        return problems
+
+    def problem(self, statement, plan):
+        """Why a plan is unacceptable, or None"""
+        scans = [scan.group(1) for scan in map(_SCAN.match, plan)
+                 if scan and scan.group(1) not in self.allow_scan]
+        if not scans:
+            return None
+        if _WHERE.search(statement):
+            return f"full scan of {scans[0]}"
+        if any(line.startswith('USE TEMP B-TREE FOR ORDER BY') for line in plan):
+            return f"full scan and sort of {scans[0]}"
+        return None
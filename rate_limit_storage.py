@@ -0,0 +1,104 @@
+"""
+SQLite storage backend for Flask-Limiter, shared by every worker on a host.
+
+With ``memory://`` each gunicorn worker counts on its own, so N workers
+allow N times the configured limits. This backend keeps fixed-window
+counters in a small WAL-mode SQLite file instead. A hit is a single
+``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` statement, which SQLite
+serializes across processes, so counts are exact without any locking of
+our own.
+
+Importing this module registers the ``sqlite`` scheme with limits:
+
+    Limiter(storage_uri="sqlite:////abs/path/rate_limits.db")   # or sqlite:///relative.db
+
+Only the fixed-window strategy (Flask-Limiter's default) is supported.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from limits.storage import Storage
+
+PURGE_EVERY = 1000  # hits between removals of expired counters
+
+
+class SQLiteStorage(Storage):
+    """Fixed-window rate limit counters in a shared SQLite file"""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        self.path = uri.split('://', 1)[1][1:] if '://' in uri else uri
+        if not self.path:
+            raise ValueError("sqlite rate limit storage needs a file path, e.g. sqlite:///rate_limits.db")
+        self.timeout = float(options.get('timeout', 5))
+        self._local = threading.local()
+        self._hits = 0
+        # The file is opened on first use, so importing the app does no I/O
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connect(self):
+        # One connection per thread, reopened in forked workers
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Counters are not worth an fsync per hit; WAL keeps the file consistent
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires REAL NOT NULL) WITHOUT ROWID"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        conn = self._connect()
+        count = conn.execute(
+            "INSERT INTO rate_limit (key, count, expires) VALUES (:key, :amount, :expires) "
+            "ON CONFLICT (key) DO UPDATE SET "
+            "count = CASE WHEN expires <= :now THEN excluded.count ELSE count + excluded.count END, "
+            "expires = CASE WHEN expires <= :now OR :elastic THEN excluded.expires ELSE expires END "
+            "RETURNING count",
+            {'key': key, 'amount': amount, 'expires': now + expiry, 'now': now,
+             'elastic': bool(elastic_expiry)}
+        ).fetchone()[0]
+        self._hits += 1
+        if self._hits % PURGE_EVERY == 0:
+            conn.execute("DELETE FROM rate_limit WHERE expires <= ?", (now,))
+        return count
+
+    def get(self, key):
+        row = self._connect().execute(
+            "SELECT count FROM rate_limit WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT expires FROM rate_limit WHERE key = ? AND expires > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._connect().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self._connect().execute("DELETE FROM rate_limit").rowcount
+
+    def clear(self, key):
+        self._connect().execute("DELETE FROM rate_limit WHERE key = ?", (key,))
@@ -0,0 +1,258 @@
+"""
+Precomputed related posts.
+
+Every published post keeps its top-N most similar published posts in the
+related_post table, so rendering them is one indexed join. Similarity
+blends the Jaccard index of the posts' tags with the weighted Jaccard
+index of their content-term distributions. Term weights live in post_term
+(post, term, weight), which doubles as an inverted index: only posts that
+share a tag or a term with a changed post are ever scored.
+
+The lists are maintained incrementally from the same after_flush hook
+pattern as the tag index; 'flask rebuild-related-posts' recomputes them.
+"""
+import re
+from collections import Counter, defaultdict
+
+from sqlalchemy import delete, event, func, inspect, insert, select
+
+TAG_WEIGHT = 0.6
+TERM_WEIGHT = 0.4
+MAX_TERMS = 64
+
+STOPWORDS = frozenset("""
+    about above after again against all also and any are because been before being below
+    between both but can could did does doing down during each few for from further had
+    has have having her here hers herself him himself his how into its itself just more
+    most not now off once only other our ours out over own same she should some such than
+    that the their theirs them then there these they this those through too under until
+    very was were what when where which while who whom why will with would you your yours
+    code class pre div span
+""".split())
+
+
+def extract_terms(*texts, max_terms=MAX_TERMS):
+    """Top content terms of a post as {term: weight}, weights summing to 1"""
+    counts = Counter()
+    for text in texts:
+        text = re.sub(r'<[^>]+>', ' ', text or '').lower()
+        counts.update(word for word in re.findall(r'[a-z][a-z0-9]{2,}', text) if word not in STOPWORDS)
+    top = counts.most_common(max_terms)
+    total = sum(count for _, count in top)
+    return {term: count / total for term, count in top} if total else {}
+
+
+class RelatedPosts:
+    """Maintain and read the precomputed related-post lists"""
+
+    def __init__(self, app=None, db=None, post_model=None, related_model=None,
+                 term_table=None, tag_link_table=None):
+        self.top_n = 5
+        if app is not None:
+            self.init_app(app, db, post_model, related_model, term_table, tag_link_table)
+
+    def init_app(self, app, db, post_model, related_model, term_table, tag_link_table):
+        self.app = app
+        self.db = db
+        self.post_model = post_model
+        self.related_model = related_model
+        self.term_table = term_table
+        self.tag_link_table = tag_link_table
+        self.top_n = app.config.get('RELATED_POSTS_COUNT', self.top_n)
+        # Registered after the tag index, so tag links are current here
+        event.listen(db.session, 'after_flush', self._after_flush)
+        app.extensions['related_posts'] = self
+
+    # --- Reading ---
+    def for_post(self, post_id, limit=3):
+        """Published related posts for post_id, best first (one query)"""
+        post = self.post_model
+        related = self.related_model
+        return (
+            post.query
+            .join(related, related.related_id == post.id)
+            .filter(related.post_id == post_id, post.published == True)
+            .order_by(related.score.desc())
+            .limit(limit)
+            .all()
+        )
+
+    # --- Incremental maintenance ---
+    def _after_flush(self, session, flush_context):
+        changed = [obj for obj in session.new if isinstance(obj, self.post_model)]
+        for obj in session.dirty:
+            if isinstance(obj, self.post_model) and self._content_changed(obj):
+                changed.append(obj)
+        removed = [obj.id for obj in session.deleted if isinstance(obj, self.post_model)]
+        if not changed and not removed:
+            return
+
+        connection = session.connection()
+        for post_id in removed:
+            self._remove(connection, post_id)
+        for post in changed:
+            if post.published:
+                self._index_terms(connection, post.id, post.title, post.excerpt, post.content)
+                self._refresh(connection, post.id)
+            else:
+                self._remove(connection, post.id)
+
+    def _content_changed(self, post):
+        attrs = inspect(post).attrs
+        return any(
+            getattr(attrs, name).history.has_changes()
+            for name in ('title', 'excerpt', 'content', 'tags', 'published')
+        )
+
+    def _index_terms(self, connection, post_id, *texts):
+        terms = self.term_table
+        connection.execute(delete(terms).where(terms.c.post_id == post_id))
+        weights = extract_terms(*texts)
+        if weights:
+            connection.execute(insert(terms), [
+                {'post_id': post_id, 'term': term, 'weight': weight}
+                for term, weight in weights.items()
+            ])
+
+    def _remove(self, connection, post_id):
+        terms = self.term_table
+        related = self.related_model.__table__
+        affected = set(connection.execute(
+            select(related.c.post_id).where(related.c.related_id == post_id)
+        ).scalars())
+        connection.execute(delete(terms).where(terms.c.post_id == post_id))
+        connection.execute(delete(related).where(
+            (related.c.post_id == post_id) | (related.c.related_id == post_id)
+        ))
+        # Lists that lost an entry are recomputed so they stay full
+        for other_id in affected - {post_id}:
+            self._store(connection, other_id, self._score(connection, other_id))
+
+    def _refresh(self, connection, post_id):
+        related = self.related_model.__table__
+        scores = self._score(connection, post_id)
+        self._store(connection, post_id, scores)
+
+        # Offer this post to every neighbour; drop it where it no longer scores
+        previous = set(connection.execute(
+            select(related.c.post_id).where(related.c.related_id == post_id)
+        ).scalars())
+        connection.execute(delete(related).where(related.c.related_id == post_id))
+        for other_id, score in scores.items():
+            self._offer(connection, other_id, post_id, score)
+        for other_id in previous - set(scores):
+            self._store(connection, other_id, self._score(connection, other_id))
+
+    def _offer(self, connection, post_id, candidate_id, score):
+        related = self.related_model.__table__
+        current = connection.execute(
+            select(related.c.related_id, related.c.score)
+            .where(related.c.post_id == post_id)
+            .order_by(related.c.score)
+        ).all()
+        if len(current) >= self.top_n:
+            weakest_id, weakest_score = current[0]
+            if score <= weakest_score:
+                return
+            connection.execute(delete(related).where(
+                related.c.post_id == post_id, related.c.related_id == weakest_id
+            ))
+        connection.execute(insert(related), [
+            {'post_id': post_id, 'related_id': candidate_id, 'score': score}
+        ])
+
+    def _store(self, connection, post_id, scores):
+        related = self.related_model.__table__
+        connection.execute(delete(related).where(related.c.post_id == post_id))
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:self.top_n]
+        if best:
+            connection.execute(insert(related), [
+                {'post_id': post_id, 'related_id': other_id, 'score': score}
+                for other_id, score in best
+            ])
+
+    # --- Scoring ---
+    def _score(self, connection, post_id):
+        """{other published post id: similarity} for posts sharing a tag or term"""
+        tag_scores = self._tag_similarity(connection, post_id)
+        term_scores = self._term_similarity(connection, post_id)
+        candidates = set(tag_scores) | set(term_scores)
+        if not candidates:
+            return {}
+
+        post = self.post_model.__table__
+        published = set(connection.execute(
+            select(post.c.id).where(post.c.id.in_(candidates), post.c.published == True)
+        ).scalars())
+        return {
+            other_id: round(TAG_WEIGHT * tag_scores.get(other_id, 0)
+                            + TERM_WEIGHT * term_scores.get(other_id, 0), 6)
+            for other_id in published
+        }
+
+    def _tag_similarity(self, connection, post_id):
+        links = self.tag_link_table
+        own_tags = select(links.c.tag_id).where(links.c.post_id == post_id)
+        own_count = connection.execute(
+            select(func.count()).select_from(links).where(links.c.post_id == post_id)
+        ).scalar()
+        if not own_count:
+            return {}
+        shared = dict(connection.execute(
+            select(links.c.post_id, func.count())
+            .where(links.c.tag_id.in_(own_tags), links.c.post_id != post_id)
+            .group_by(links.c.post_id)
+        ).all())
+        if not shared:
+            return {}
+        sizes = dict(connection.execute(
+            select(links.c.post_id, func.count())
+            .where(links.c.post_id.in_(list(shared)))
+            .group_by(links.c.post_id)
+        ).all())
+        return {
+            other_id: count / (own_count + sizes[other_id] - count)
+            for other_id, count in shared.items()
+        }
+
+    def _term_similarity(self, connection, post_id):
+        terms = self.term_table
+        own = dict(connection.execute(
+            select(terms.c.term, terms.c.weight).where(terms.c.post_id == post_id)
+        ).all())
+        if not own:
+            return {}
+        # Weights sum to 1 per post, so sum(max) == 2 - sum(min)
+        overlap = defaultdict(float)
+        rows = connection.execute(
+            select(terms.c.post_id, terms.c.term, terms.c.weight)
+            .where(terms.c.term.in_(list(own)), terms.c.post_id != post_id)
+        )
+        for other_id, term, weight in rows:
+            overlap[other_id] += min(weight, own[term])
+        return {other_id: total / (2 - total) for other_id, total in overlap.items()}
+
+    # --- Full rebuild ---
+    def rebuild(self):
+        """Re-index terms and recompute every published post's list"""
+        session = self.db.session
+        connection = session.connection()
+        post = self.post_model.__table__
+        connection.execute(delete(self.term_table))
+        connection.execute(delete(self.related_model.__table__))
+
+        post_ids = []
+        rows = connection.execute(
+            select(post.c.id, post.c.title, post.c.excerpt, post.c.content)
+            .where(post.c.published == True)
+        )
+        for post_id, title, excerpt, content in rows.all():
+            self._index_terms(connection, post_id, title, excerpt, content)
+            post_ids.append(post_id)
+        for post_id in post_ids:
+            self._store(connection, post_id, self._score(connection, post_id))
+        session.commit()
+        return len(post_ids)
+
+    def is_empty(self):
+        return self.db.session.execute(select(self.term_table.c.post_id).limit(1)).first() is None
@@ -0,0 +1,209 @@
+"""
+VisitorLog retention.
+
+Rows older than ANALYTICS_RETENTION_DAYS are removed in small batches, each
+in its own short transaction, so pruning never holds the SQLite writer lock
+for long. Deleted rows can optionally be archived to gzip-compressed
+per-month JSON Lines files, and freed pages are handed back to the
+filesystem a few at a time with PRAGMA incremental_vacuum.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, text
+
+
+class VisitorLogRetention:
+    """Prune, archive and compact expired visitor data"""
+
+    def __init__(self, app=None, db=None, log_model=None, extra_targets=()):
+        self.retention_days = 90
+        self.batch_size = 1000
+        self.max_batches = 50
+        self.batch_pause = 0.05
+        self.interval = 3600
+        self.vacuum_pages = 500
+        self.archive_folder = None
+        self.rows_pruned = 0
+        self.rows_archived = 0
+        self.bytes_reclaimed = 0
+        self.runs = 0
+        self.last_run = None
+        self._lock = threading.Lock()
+        self._next_run = 0
+        if app is not None:
+            self.init_app(app, db, log_model, extra_targets)
+
+    def init_app(self, app, db, log_model, extra_targets=()):
+        """extra_targets: (model, datetime column) pairs pruned without archiving"""
+        self.app = app
+        self.db = db
+        self.log_model = log_model
+        self.extra_targets = list(extra_targets)
+        self.retention_days = app.config.get('ANALYTICS_RETENTION_DAYS', self.retention_days)
+        self.batch_size = app.config.get('ANALYTICS_RETENTION_BATCH_SIZE', self.batch_size)
+        self.max_batches = app.config.get('ANALYTICS_RETENTION_MAX_BATCHES', self.max_batches)
+        self.batch_pause = app.config.get('ANALYTICS_RETENTION_BATCH_PAUSE', self.batch_pause)
+        self.interval = app.config.get('ANALYTICS_RETENTION_INTERVAL', self.interval)
+        self.vacuum_pages = app.config.get('ANALYTICS_VACUUM_PAGES', self.vacuum_pages)
+        self.archive_folder = app.config.get('ANALYTICS_ARCHIVE_FOLDER', self.archive_folder)
+        app.extensions['visitor_log_retention'] = self
+
+    def maybe_run(self):
+        """Run a bounded pass if the retention interval has elapsed"""
+        if time.monotonic() < self._next_run:
+            return None
+        self._next_run = time.monotonic() + self.interval
+        return self.run(max_batches=self.max_batches)
+
+    def run(self, max_batches=None):
+        """Prune expired rows; returns the stats for this pass"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            cutoff = datetime.utcnow() - timedelta(days=self.retention_days)
+            pruned = archived = 0
+
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                deleted, saved = self._prune_log_batch(cutoff)
+                pruned += deleted
+                archived += saved
+                batches += 1
+                if deleted < self.batch_size:
+                    break
+                time.sleep(self.batch_pause)
+
+            # Extra targets share the pass's batch budget; what is left waits for the next interval
+            for model, column in self.extra_targets:
+                while max_batches is None or batches < max_batches:
+                    deleted = self._prune_batch(model, column, cutoff)
+                    batches += 1
+                    if deleted < self.batch_size:
+                        break
+                    time.sleep(self.batch_pause)
+
+            reclaimed = self.reclaim_space()
+
+            self.rows_pruned += pruned
+            self.rows_archived += archived
+            self.bytes_reclaimed += reclaimed
+            self.runs += 1
+            self.last_run = datetime.utcnow()
+            if pruned or reclaimed:
+                self.app.logger.info(
+                    f"Visitor log retention: pruned {pruned} rows, archived {archived}, "
+                    f"reclaimed {reclaimed} bytes"
+                )
+            return {'pruned': pruned, 'archived': archived, 'bytes_reclaimed': reclaimed}
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        return {
+            'retention_days': self.retention_days,
+            'rows_pruned': self.rows_pruned,
+            'rows_archived': self.rows_archived,
+            'bytes_reclaimed': self.bytes_reclaimed,
+            'runs': self.runs,
+            'last_run': self.last_run.isoformat() if self.last_run else None,
+        }
+
+    def _expired_ids(self, model, column, cutoff):
+        return (
+            select(model.id)
+            .where(column < cutoff)
+            # Oldest first along the cutoff column's index (no table scan, no sort)
+            .order_by(column)
+            .limit(self.batch_size)
+            .scalar_subquery()
+        )
+
+    def _prune_log_batch(self, cutoff):
+        log = self.log_model
+        session = self.db.session
+        stmt = delete(log).where(log.id.in_(self._expired_ids(log, log.timestamp, cutoff)))
+        if not self.archive_folder:
+            result = session.execute(stmt, execution_options={'synchronize_session': False})
+            session.commit()
+            return result.rowcount, 0
+
+        # DELETE ... RETURNING hands this worker exactly the rows it removed,
+        # so concurrent workers can never archive the same row twice.
+        try:
+            rows = session.execute(
+                stmt.returning(log.id, log.ip, log.user_agent, log.path, log.timestamp),
+                execution_options={'synchronize_session': False}
+            ).all()
+            self._archive(rows)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        return len(rows), len(rows)
+
+    def _prune_batch(self, model, column, cutoff):
+        result = self.db.session.execute(
+            delete(model).where(model.id.in_(self._expired_ids(model, column, cutoff))),
+            execution_options={'synchronize_session': False}
+        )
+        self.db.session.commit()
+        return result.rowcount
+
+    def _archive(self, rows):
+        if not rows:
+            return
+        by_month = defaultdict(list)
+        for row in rows:
+            month = row.timestamp.strftime('%Y-%m') if row.timestamp else 'unknown'
+            by_month[month].append({
+                'id': row.id,
+                'ip': row.ip,
+                'user_agent': row.user_agent,
+                'path': row.path,
+                'timestamp': row.timestamp.isoformat() if row.timestamp else None,
+            })
+
+        os.makedirs(self.archive_folder, exist_ok=True)
+        for month, entries in by_month.items():
+            # Appending gzip members keeps each file a valid .gz stream
+            path = os.path.join(self.archive_folder, f"visitor_log-{month}.jsonl.gz")
+            with gzip.open(path, 'at', encoding='utf-8') as archive:
+                for entry in entries:
+                    archive.write(json.dumps(entry) + '\n')
+
+    # --- Space reclamation ---
+    def _pragma(self, name):
+        return self.db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+    def reclaim_space(self):
+        """Release up to vacuum_pages free pages; returns bytes reclaimed"""
+        if self.db.engine.dialect.name != 'sqlite':
+            return 0
+        # auto_vacuum 2 == INCREMENTAL; see enable_incremental_vacuum()
+        if self._pragma('auto_vacuum') != 2:
+            return 0
+        page_size = self._pragma('page_size')
+        before = self._pragma('page_count')
+        self.db.session.commit()
+
+        # sqlite3's execute() steps a statement once and incremental_vacuum
+        # frees one page per step; executescript() runs it to completion.
+        raw = self.db.engine.raw_connection()
+        try:
+            raw.cursor().executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)});")
+        finally:
+            raw.close()
+        after = self._pragma('page_count')
+        return max(before - after, 0) * page_size
+
+    def enable_incremental_vacuum(self):
+        """Switch an existing SQLite file to auto_vacuum=INCREMENTAL (runs a full VACUUM once)"""
+        with self.db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
@@ -0,0 +1,194 @@
+"""
+Full-text search over blog posts, code snippets and projects.
+
+A single SQLite FTS5 table indexes all three content types. It is kept in
+sync by triggers on the source tables, so every insert, update and delete
+(ORM or raw SQL) is reflected immediately. Each source row maps to the FTS
+rowid ``id * 8 + type code``, which makes trigger updates a rowid lookup.
+"""
+import re
+
+from markupsafe import escape
+from sqlalchemy import column, false, select, table, text
+from sqlalchemy.exc import OperationalError
+
+SEARCH_TABLE = 'search_index'
+
+# Expressions use {row} so they work both in triggers (new.) and in rebuilds
+SEARCH_SOURCES = {
+    'blog': {
+        'code': 1,
+        'table': 'blog_post',
+        'title': "{row}.title",
+        'body': "coalesce({row}.excerpt, '') || ' ' || {row}.content",
+        'tags': "coalesce({row}.tags, '')",
+        'visible': "coalesce({row}.published, 0)",
+        'watch': 'title, content, excerpt, tags, published',
+    },
+    'snippet': {
+        'code': 2,
+        'table': 'code_snippet',
+        'title': "{row}.title",
+        'body': "coalesce({row}.description, '') || ' ' || {row}.code",
+        'tags': "coalesce({row}.tags, '') || ' ' || {row}.language",
+        'visible': "1",
+        'watch': 'title, description, code, tags, language',
+    },
+    'project': {
+        'code': 3,
+        'table': 'project',
+        'title': "{row}.title",
+        'body': "{row}.description",
+        'tags': "''",
+        'visible': "1",
+        'watch': 'title, description',
+    },
+}
+
+# Control-character markers survive HTML escaping and are swapped for <mark> tags
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+
+def build_match_query(query, max_terms=10):
+    """Turn free text into a safe FTS5 query: every word, prefix-matched"""
+    terms = re.findall(r'\w+', (query or '').lower())[:max_terms]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def mark_highlights(fragment):
+    escaped = str(escape(fragment or ''))
+    return escaped.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+class SearchIndex:
+    """Create, maintain and query the FTS5 search index"""
+
+    def __init__(self, app=None, db=None):
+        self.available = False
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        self.app = app
+        self.db = db
+        app.extensions['search_index'] = self
+
+    def _row_sql(self, doc_type, row):
+        source = SEARCH_SOURCES[doc_type]
+        return (
+            f"{row}.id * 8 + {source['code']}, '{doc_type}', {row}.id, "
+            f"{source['title'].format(row=row)}, {source['body'].format(row=row)}, "
+            f"{source['tags'].format(row=row)}, {source['visible'].format(row=row)}"
+        )
+
+    def create(self):
+        """Create the FTS table and sync triggers; populate it on first run"""
+        try:
+            with self.db.engine.begin() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': SEARCH_TABLE}
+                ).first()
+                conn.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                    "title, body, tags, doc_type UNINDEXED, doc_id UNINDEXED, visible UNINDEXED, "
+                    "tokenize = 'porter unicode61')"
+                )
+                for doc_type in SEARCH_SOURCES:
+                    self._create_triggers(conn, doc_type)
+                if not exists:
+                    self._populate(conn)
+        except OperationalError as e:
+            # SQLite built without FTS5: callers fall back to LIKE filters
+            self.available = False
+            self.app.logger.warning(f"Full-text search unavailable: {e}")
+            return False
+        self.available = True
+        return True
+
+    def detect(self):
+        """Mark the index usable if an earlier 'flask init-db' created it"""
+        try:
+            with self.db.engine.connect() as conn:
+                self.available = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': SEARCH_TABLE}
+                ).first() is not None
+        except OperationalError:
+            self.available = False
+        return self.available
+
+    def _create_triggers(self, conn, doc_type):
+        source = SEARCH_SOURCES[doc_type]
+        name = source['table']
+        columns = "rowid, doc_type, doc_id, title, body, tags, visible"
+        insert = f"INSERT INTO {SEARCH_TABLE}({columns}) VALUES ({self._row_sql(doc_type, 'new')});"
+        delete = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 8 + {source['code']};"
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {name}_search_ai AFTER INSERT ON {name} BEGIN {insert} END"
+        )
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {name}_search_ad AFTER DELETE ON {name} BEGIN {delete} END"
+        )
+        # Only content columns re-index; counters such as views do not
+        conn.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {name}_search_au AFTER UPDATE OF {source['watch']} "
+            f"ON {name} BEGIN {delete} {insert} END"
+        )
+
+    def _populate(self, conn):
+        columns = "rowid, doc_type, doc_id, title, body, tags, visible"
+        for doc_type, source in SEARCH_SOURCES.items():
+            conn.exec_driver_sql(
+                f"INSERT INTO {SEARCH_TABLE}({columns}) "
+                f"SELECT {self._row_sql(doc_type, source['table'])} FROM {source['table']}"
+            )
+
+    def rebuild(self):
+        """Drop every indexed document and re-read the source tables"""
+        with self.db.engine.begin() as conn:
+            conn.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+            self._populate(conn)
+            conn.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+    def id_subquery(self, doc_type, query):
+        """SELECT of matching ids for doc_type, for use in Model.id.in_()"""
+        match = build_match_query(query)
+        stmt = select(column('doc_id')).select_from(table(SEARCH_TABLE))
+        if not match:
+            return stmt.where(false())
+        return stmt.where(
+            text(f"{SEARCH_TABLE} MATCH :match AND doc_type = :doc_type")
+            .bindparams(match=match, doc_type=doc_type)
+        )
+
+    def search(self, query, types=None, limit=20):
+        """Ranked matches as dicts with type, id, score and highlighted text"""
+        match = build_match_query(query)
+        if not match:
+            return []
+        types = [t for t in (types or SEARCH_SOURCES) if t in SEARCH_SOURCES]
+        if not types:
+            return []
+
+        type_params = {f"type_{i}": t for i, t in enumerate(types)}
+        type_list = ', '.join(f":{name}" for name in type_params)
+        # bm25 weights: title 10, body 1, tags 5 (lower score = better match)
+        rows = self.db.session.execute(text(
+            f"SELECT doc_type, doc_id, bm25({SEARCH_TABLE}, 10.0, 1.0, 5.0) AS score, "
+            f"highlight({SEARCH_TABLE}, 0, :mark_start, :mark_end) AS title, "
+            f"snippet({SEARCH_TABLE}, 1, :mark_start, :mark_end, '...', 16) AS excerpt "
+            f"FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH :match AND visible = 1 AND doc_type IN ({type_list}) "
+            f"ORDER BY score LIMIT :limit"
+        ), {'match': match, 'mark_start': MARK_START, 'mark_end': MARK_END,
+            'limit': limit, **type_params}).all()
+
+        return [{
+            'type': row.doc_type,
+            'id': row.doc_id,
+            'score': round(-row.score, 4),
+            'title': mark_highlights(row.title),
+            'excerpt': mark_highlights(row.excerpt),
+        } for row in rows]
@@ -0,0 +1,191 @@
+"""
+Content-addressed file storage for uploads.
+
+Uploaded files stream straight into the store: the request class hands the
+multipart parser a temporary file inside the storage folder that hashes
+every chunk as it is written, so a 16 MB upload is never held in memory
+and never copied. Once parsed, the file is hard-linked to
+
+    <STORAGE_FOLDER>/blobs/<sha256[:2]>/<sha256>
+
+and a second upload of the same bytes only adds a database row (or reuses
+the existing one). Blobs never change, so their SHA-256 is a strong ETag.
+
+Downloads go through ``send()``: with STORAGE_ACCEL_PREFIX set the app
+answers with X-Accel-Redirect and nginx pushes the bytes (ranges
+included) from an internal location; otherwise send_file streams the file
+with Range and conditional request support.
+"""
+import hashlib
+import mimetypes
+import os
+import tempfile
+import threading
+
+from flask import Response, request, send_file
+from werkzeug.utils import secure_filename
+
+# Served inline; anything else is a download
+INLINE_TYPES = ('image/', 'application/pdf', 'text/plain')
+
+
+class HashingFile:
+    """Temporary upload file that hashes what the multipart parser writes"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=directory, prefix='upload-')
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.hash.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def __iter__(self):
+        return iter(self.file)
+
+
+class ContentStore:
+    """Store uploads by SHA-256 and serve them, or other files, efficiently"""
+
+    def __init__(self, app=None, db=None, file_model=None, allowed_extensions=None):
+        self.chunk_size = 64 * 1024
+        self.max_age = 3600
+        self._etags = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db, file_model, allowed_extensions)
+
+    def init_app(self, app, db, file_model, allowed_extensions=None):
+        self.app = app
+        self.db = db
+        self.file_model = file_model
+        self.allowed_extensions = set(allowed_extensions or ())
+        self.root = app.config.get('STORAGE_FOLDER') or os.path.join(app.instance_path, 'files')
+        self.accel_prefix = app.config.get('STORAGE_ACCEL_PREFIX')
+        self.max_age = app.config.get('STORAGE_MAX_AGE', self.max_age)
+
+        store = self
+
+        class StreamingRequest(app.request_class):
+            def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+                return HashingFile(os.path.join(store.root, 'tmp'))
+
+        app.request_class = StreamingRequest
+        app.extensions['content_store'] = self
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, 'blobs', digest[:2], digest)
+
+    # --- Upload ---
+    def allowed(self, filename):
+        return '.' in filename and filename.rsplit('.', 1)[1].lower() in self.allowed_extensions
+
+    def store(self, upload, public=False):
+        """Keep a werkzeug FileStorage; returns (row, created)"""
+        filename = secure_filename(upload.filename or '')
+        if not filename or not self.allowed(filename):
+            raise ValueError("File type not allowed")
+        stream = upload.stream
+        if not isinstance(stream, HashingFile):
+            # Parsed without the streaming request class: copy once, hashing as we go
+            stream = HashingFile(os.path.join(self.root, 'tmp'))
+            for chunk in iter(lambda: upload.stream.read(self.chunk_size), b''):
+                stream.write(chunk)
+        if stream.size == 0:
+            raise ValueError("File is empty")
+        digest = stream.hash.hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            stream.flush()
+            os.fsync(stream.fileno())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.link(stream.name, path)
+                os.chmod(path, 0o644)  # readable by nginx for X-Accel-Redirect
+            except FileExistsError:
+                pass  # the same bytes arrived concurrently
+        stream.close()
+
+        model = self.file_model
+        row = model.query.filter_by(sha256=digest, filename=filename).first()
+        if row is not None:
+            if public and not row.public:
+                row.public = True
+                self.db.session.commit()
+            return row, False
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        row = model(sha256=digest, filename=filename, content_type=content_type,
+                    size=stream.size, public=public)
+        self.db.session.add(row)
+        self.db.session.commit()
+        return row, True
+
+    # --- Download ---
+    def send_blob(self, row):
+        return self.send(
+            self.blob_path(row.sha256), row.sha256, row.content_type, row.filename,
+            accel_uri=f"{self.accel_prefix.rstrip('/')}/{row.sha256[:2]}/{row.sha256}" if self.accel_prefix else None,
+            max_age=31536000 if row.public else 0, private=not row.public,
+        )
+
+    def send_static(self, filename, as_attachment=False):
+        """A file under the static folder, served like a blob"""
+        path = os.path.join(self.app.static_folder, filename)
+        etag = self.file_etag(path)
+        if etag is None:
+            return None
+        return self.send(
+            path, etag, mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            os.path.basename(filename), as_attachment=as_attachment,
+            accel_uri=f"{self.app.static_url_path}/{filename}" if self.accel_prefix else None,
+            max_age=self.max_age,
+        )
+
+    def file_etag(self, path):
+        """SHA-256 of a mutable file, recomputed only when its size or mtime changes"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = self._etags.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(chunk)
+        with self._lock:
+            self._etags[path] = (key, digest.hexdigest())
+        return digest.hexdigest()
+
+    def send(self, path, etag, content_type, download_name, as_attachment=None, accel_uri=None,
+             max_age=0, private=False):
+        """Response for a file: X-Accel-Redirect when configured, else send_file with ranges"""
+        if as_attachment is None:
+            as_attachment = not content_type.startswith(INLINE_TYPES)
+        if accel_uri is None:
+            response = send_file(path, mimetype=content_type, as_attachment=as_attachment,
+                                 download_name=download_name, conditional=True, etag=etag, max_age=max_age)
+        else:
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+            else:
+                # nginx serves the body and answers Range requests itself
+                response = Response(content_type=content_type)
+                response.headers['X-Accel-Redirect'] = accel_uri
+                disposition = 'attachment' if as_attachment else 'inline'
+                response.headers['Content-Disposition'] = f'{disposition}; filename="{download_name}"'
+            response.set_etag(etag)
+            response.cache_control.max_age = max_age
+        if private:
+            response.cache_control.private = True
+        else:
+            response.cache_control.public = True
+        return response
@@ -0,0 +1,145 @@
+"""
+Normalized blog tag index.
+
+BlogPost.tags stays the editable comma-separated string; this module keeps
+a Tag table and a post/tag association table in sync with it, including a
+per-tag count of published posts. The tag cloud and the /blog tag filter
+read only these tables and never touch post bodies.
+"""
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+MAX_TAG_LENGTH = 50
+
+
+def parse_tags(tags):
+    """Split a comma-separated tag string into unique, trimmed names"""
+    seen = set()
+    names = []
+    for name in (tags or '').split(','):
+        name = name.strip()[:MAX_TAG_LENGTH]
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+class TagIndex:
+    """Keep Tag / blog_post_tag in sync with BlogPost.tags"""
+
+    def __init__(self, app=None, db=None, post_model=None, tag_model=None, link_table=None):
+        if app is not None:
+            self.init_app(app, db, post_model, tag_model, link_table)
+
+    def init_app(self, app, db, post_model, tag_model, link_table):
+        self.app = app
+        self.db = db
+        self.post_model = post_model
+        self.tag_model = tag_model
+        self.link_table = link_table
+        event.listen(db.session, 'after_flush', self._after_flush)
+        app.extensions['tag_index'] = self
+
+    # --- Maintenance ---
+    def _after_flush(self, session, flush_context):
+        # new/dirty/deleted still describe what this flush just wrote
+        changed = [(obj.id, obj.tags) for obj in session.new if isinstance(obj, self.post_model)]
+        for obj in session.dirty:
+            if isinstance(obj, self.post_model) and self._tags_changed(obj):
+                changed.append((obj.id, obj.tags))
+        removed = [obj.id for obj in session.deleted if isinstance(obj, self.post_model)]
+        if not changed and not removed:
+            return
+
+        connection = session.connection()
+        touched = set()
+        for post_id in removed:
+            touched |= self._unlink(connection, post_id)
+        for post_id, tags in changed:
+            touched |= self._unlink(connection, post_id)
+            touched |= self._link(connection, post_id, parse_tags(tags))
+        self._refresh_counts(connection, touched)
+
+    def _tags_changed(self, post):
+        # View-count updates and the like must not rewrite tag links
+        attrs = inspect(post).attrs
+        return attrs.tags.history.has_changes() or attrs.published.history.has_changes()
+
+    def _unlink(self, connection, post_id):
+        link = self.link_table
+        tag_ids = set(connection.execute(
+            select(link.c.tag_id).where(link.c.post_id == post_id)
+        ).scalars())
+        if tag_ids:
+            connection.execute(delete(link).where(link.c.post_id == post_id))
+        return tag_ids
+
+    def _link(self, connection, post_id, names):
+        if not names:
+            return set()
+        tag_table = self.tag_model.__table__
+        connection.execute(
+            sqlite_insert(tag_table).on_conflict_do_nothing(),
+            [{'name': name, 'post_count': 0} for name in names]
+        )
+        # Tag names are NOCASE, so this resolves "Python" and "python" alike
+        tag_ids = set(connection.execute(
+            select(tag_table.c.id).where(tag_table.c.name.in_(names))
+        ).scalars())
+        connection.execute(
+            insert(self.link_table),
+            [{'post_id': post_id, 'tag_id': tag_id} for tag_id in tag_ids]
+        )
+        return tag_ids
+
+    def _refresh_counts(self, connection, tag_ids):
+        if not tag_ids:
+            return
+        tag_table = self.tag_model.__table__
+        link = self.link_table
+        post_table = self.post_model.__table__
+        published_count = (
+            select(func.count())
+            .select_from(link.join(post_table, post_table.c.id == link.c.post_id))
+            .where(link.c.tag_id == tag_table.c.id, post_table.c.published == True)
+            .scalar_subquery()
+        )
+        connection.execute(
+            update(tag_table).where(tag_table.c.id.in_(tag_ids)).values(post_count=published_count)
+        )
+
+    def rebuild(self):
+        """Re-derive every tag link and count from BlogPost.tags"""
+        session = self.db.session
+        connection = session.connection()
+        connection.execute(delete(self.link_table))
+        posts = session.execute(select(self.post_model.id, self.post_model.tags)).all()
+        touched = set()
+        for post_id, tags in posts:
+            touched |= self._link(connection, post_id, parse_tags(tags))
+        tag_table = self.tag_model.__table__
+        connection.execute(update(tag_table).values(post_count=0))
+        self._refresh_counts(connection, touched)
+        session.commit()
+        return len(posts)
+
+    def is_empty(self):
+        return self.db.session.execute(select(self.link_table.c.post_id).limit(1)).first() is None
+
+    # --- Queries ---
+    def tag_cloud(self):
+        """(name, published post count) for every tag in use, by name"""
+        tag = self.tag_model
+        return self.db.session.execute(
+            select(tag.name, tag.post_count).where(tag.post_count > 0).order_by(tag.name)
+        ).all()
+
+    def post_ids_subquery(self, name):
+        """SELECT of post ids carrying exactly this tag (case-insensitive)"""
+        link = self.link_table
+        tag_table = self.tag_model.__table__
+        return (
+            select(link.c.post_id)
+            .join(tag_table, tag_table.c.id == link.c.tag_id)
+            .where(tag_table.c.name == name.strip())
+        )
@@ -0,0 +1,199 @@
+"""
+Rule-based triage of contact inquiries.
+
+Rules are rows of TriageRule (phrase, action, value, weight) edited from
+the admin dashboard. They are compiled into a single regex built from a
+trie of every phrase, so one scan over the lowercased text finds all of
+them however many rules there are. From the matched phrases one result is
+derived:
+
+* spam     - total weight of matched spam phrases reaches the threshold
+* priority - the highest priority named by a matched priority rule
+* category - the category rule with the largest total weight, if any
+
+The compiled engine is cached per worker and rebuilt when the rule table's
+content version changes, so edits made in one worker reach all of them.
+"""
+import re
+from collections import defaultdict, namedtuple
+
+from sqlalchemy import bindparam, select, update
+
+ACTIONS = ('spam', 'priority', 'category')
+PRIORITIES = ('low', 'normal', 'high')
+
+TriageResult = namedtuple('TriageResult', 'spam spam_score priority category matched')
+
+DEFAULT_RULES = (
+    [(phrase, 'spam', '', 1)
+     for phrase in ('viagra', 'casino', 'lottery', 'winner', 'congratulations', 'click here')]
+    + [(phrase, 'priority', 'high', 1)
+       for phrase in ('urgent', 'asap', 'emergency', 'critical', 'job', 'opportunity')]
+)
+
+
+def _trie_pattern(node):
+    """Regex for a trie: alternatives share prefixes, so matching never backtracks far"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    optional = '' in node
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')' + ('?' if optional else '')
+
+
+class TriageEngine:
+    """A compiled rule set; triage() scans the text once"""
+
+    def __init__(self, rules, spam_threshold=1):
+        self.spam_threshold = spam_threshold
+        self.rules = defaultdict(list)
+        trie = {}
+        for phrase, action, value, weight in rules:
+            phrase = (phrase or '').strip().lower()
+            if not phrase or action not in ACTIONS:
+                continue
+            self.rules[phrase].append((action, value, weight))
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self.lengths = sorted({len(phrase) for phrase in self.rules})
+        # Lookahead so matches may overlap; the greedy trie yields the longest one per position
+        self.pattern = re.compile(f'(?=({_trie_pattern(trie)}))') if self.rules else None
+
+    def matches(self, text):
+        found = set()
+        if self.pattern is None:
+            return found
+        for match in self.pattern.finditer(text.lower()):
+            longest = match.group(1)
+            # Shorter phrases starting at the same position are prefixes of the longest
+            for length in self.lengths:
+                if length > len(longest):
+                    break
+                if longest[:length] in self.rules:
+                    found.add(longest[:length])
+        return found
+
+    def triage(self, *texts, category=None):
+        matched = self.matches('\n'.join(text or '' for text in texts))
+        spam_score = 0
+        priority = 'normal'
+        categories = defaultdict(int)
+        for phrase in matched:
+            for action, value, weight in self.rules[phrase]:
+                if action == 'spam':
+                    spam_score += weight
+                elif action == 'priority' and value in PRIORITIES:
+                    if PRIORITIES.index(value) > PRIORITIES.index(priority):
+                        priority = value
+                elif action == 'category' and value:
+                    categories[value] += weight
+        if categories:
+            category = max(sorted(categories), key=categories.get)
+        return TriageResult(
+            spam=spam_score >= self.spam_threshold,
+            spam_score=spam_score,
+            priority=priority,
+            category=category,
+            matched=sorted(matched),
+        )
+
+
+class InquiryTriage:
+    """Load, cache and apply the admin-edited triage rules"""
+
+    def __init__(self, app=None, db=None, rule_model=None, inquiry_model=None, versions=None):
+        self.spam_threshold = 1
+        self._engine = None
+        self._version = None
+        if app is not None:
+            self.init_app(app, db, rule_model, inquiry_model, versions)
+
+    def init_app(self, app, db, rule_model, inquiry_model, versions=None):
+        self.app = app
+        self.db = db
+        self.rule_model = rule_model
+        self.inquiry_model = inquiry_model
+        self.versions = versions
+        self.spam_threshold = app.config.get('TRIAGE_SPAM_THRESHOLD', self.spam_threshold)
+        if versions is not None:
+            versions.track(rule_model)
+        app.extensions['inquiry_triage'] = self
+
+    def _rules_version(self):
+        if self.versions is None or not self.versions.available:
+            return None
+        name = self.rule_model.__table__.name
+        return self.versions.versions([name]).get(name)
+
+    def engine(self):
+        """The compiled engine, rebuilt only when the rules changed"""
+        version = self._rules_version()
+        if self._engine is None or version is None or version != self._version:
+            rule = self.rule_model
+            rows = self.db.session.execute(
+                select(rule.pattern, rule.action, rule.value, rule.weight)
+            ).all()
+            self._engine = TriageEngine(rows, self.spam_threshold)
+            self._version = version
+        return self._engine
+
+    def invalidate(self):
+        self._engine = None
+
+    def triage(self, subject, message, category=None):
+        return self.engine().triage(subject, message, category=category)
+
+    def seed(self, rules=DEFAULT_RULES):
+        """Install the default rules into an empty rule table"""
+        if self.db.session.execute(select(self.rule_model.id).limit(1)).first():
+            return 0
+        for pattern, action, value, weight in rules:
+            self.db.session.add(self.rule_model(pattern=pattern, action=action, value=value, weight=weight))
+        self.db.session.commit()
+        self.invalidate()
+        return len(rules)
+
+    def retriage_all(self, batch_size=500):
+        """Re-score inquiries with the current rules; returns rows changed.
+
+        Only inquiries still flagged ``triaged`` are touched: once an admin
+        sets a status or priority, rule edits never override it. Priority is
+        recomputed; category changes only when a category rule matches; new
+        inquiries that now score as spam move to status 'spam' (and back to
+        'new' once they no longer do).
+        """
+        engine = self.engine()
+        table = self.inquiry_model.__table__
+        rows = self.db.session.execute(
+            select(table.c.id, table.c.subject, table.c.message, table.c.category,
+                   table.c.priority, table.c.status)
+            .where(table.c.triaged == True)
+            .execution_options(yield_per=batch_size)
+        )
+        changes = []
+        for row in rows:
+            result = engine.triage(row.subject, row.message, category=row.category)
+            status = row.status
+            if result.spam and status == 'new':
+                status = 'spam'
+            elif not result.spam and status == 'spam':
+                status = 'new'
+            if (result.priority, result.category, status) != (row.priority, row.category, row.status):
+                changes.append({'inquiry_id': row.id, 'priority': result.priority,
+                                'category': result.category, 'status': status})
+        rows.close()
+
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam('inquiry_id'), table.c.triaged == True)
+            .values(priority=bindparam('priority'), category=bindparam('category'),
+                    status=bindparam('status'))
+        )
+        for start in range(0, len(changes), batch_size):
+            self.db.session.execute(stmt, changes[start:start + batch_size])
+        self.db.session.commit()
+        return len(changes)
@@ -0,0 +1,103 @@
+"""
+Buffered blog view counters.
+
+Page views are counted in memory per worker and written back periodically
+as one batch of atomic ``UPDATE ... SET views = views + n`` statements.
+Concurrent workers therefore never lose increments, and an article hit
+no longer opens a write transaction.
+"""
+import atexit
+import os
+import threading
+from collections import Counter
+
+from sqlalchemy import bindparam, update
+
+
+class ViewCounter:
+    """Accumulate view increments and flush them as additive updates"""
+
+    def __init__(self, app=None, db=None, model=None):
+        self.flush_interval = 10.0
+        self.flushed = 0
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._pid = None
+        if app is not None:
+            self.init_app(app, db, model)
+
+    def init_app(self, app, db, model):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.flush_interval = app.config.get('VIEW_COUNT_FLUSH_INTERVAL', self.flush_interval)
+        app.extensions['view_counter'] = self
+        atexit.register(self.shutdown)
+
+    def increment(self, post_id, amount=1):
+        self._ensure_worker()
+        with self._lock:
+            self._pending[post_id] += amount
+
+    def pending(self, post_id):
+        """Views counted by this worker that are not in the database yet"""
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def flush(self):
+        """Write pending increments; returns the number of views flushed"""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        table = self.model.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam('post_id'))
+            # A view is not an edit: keep updated_at (and anything keyed on it) as is
+            .values(views=table.c.views + bindparam('amount'), updated_at=table.c.updated_at)
+        )
+        with self.app.app_context():
+            try:
+                self.db.session.execute(stmt, [
+                    {'post_id': post_id, 'amount': amount}
+                    for post_id, amount in pending.items()
+                ])
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                # Put the counts back so the next flush retries them
+                with self._lock:
+                    self._pending.update(pending)
+                self.app.logger.error(f"View count flush error: {e}")
+                return 0
+        total = sum(pending.values())
+        self.flushed += total
+        return total
+
+    def shutdown(self):
+        self._stopped.set()
+        if self._pid == os.getpid():
+            self.flush()
+
+    def _ensure_worker(self):
+        # One flusher thread per worker process, started on first use
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pending = Counter()
+            self._stopped = threading.Event()
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='view-count-flusher', daemon=True).start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.error(f"View count flusher error: {e}")
@@ -0,0 +1,165 @@
+"""
+Write-behind visitor logging.
+
+Requests only append an entry to an in-memory queue. A background thread
+drains the queue and writes the entries with one bulk INSERT per batch, so
+page views never wait on a SQLite commit or the writer lock.
+"""
+import atexit
+import os
+import queue
+import threading
+from datetime import datetime
+
+from sqlalchemy import insert
+
+
+class VisitorLogBuffer:
+    """Queue VisitorLog rows in memory and flush them in bulk"""
+
+    def __init__(self, app=None, db=None, model=None):
+        self.app = None
+        self.db = None
+        self.model = None
+        self.max_size = 10000
+        self.batch_size = 200
+        self.flush_interval = 5.0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self._queue = queue.Queue(maxsize=self.max_size)
+        self._counter_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._pid = None
+        self._flush_callbacks = []
+        if app is not None:
+            self.init_app(app, db, model)
+
+    def init_app(self, app, db, model):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.max_size = app.config.get('VISITOR_LOG_QUEUE_SIZE', self.max_size)
+        self.batch_size = app.config.get('VISITOR_LOG_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('VISITOR_LOG_FLUSH_INTERVAL', self.flush_interval)
+        self._queue = queue.Queue(maxsize=self.max_size)
+        app.extensions['visitor_log_buffer'] = self
+        atexit.register(self.shutdown)
+
+    def log(self, ip, user_agent, path):
+        """Enqueue a visit; returns False if the entry was dropped"""
+        self._ensure_worker()
+        entry = {
+            'ip': ip,
+            'user_agent': user_agent,
+            'path': path,
+            'timestamp': datetime.utcnow(),
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Back-pressure: never block a request on the log pipeline
+            with self._counter_lock:
+                self.dropped += 1
+            return False
+
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def after_flush(self, callback):
+        """Register a function to run (in an app context) after rows are written"""
+        self._flush_callbacks.append(callback)
+        return callback
+
+    def flush(self):
+        """Write every queued entry to the database"""
+        with self._flush_lock:
+            written = 0
+            while True:
+                batch = self._drain(self.batch_size)
+                if not batch:
+                    break
+                written += self._write(batch)
+            if written:
+                self._run_callbacks()
+
+    def shutdown(self):
+        """Stop the background thread and flush what is left"""
+        self._stopped = True
+        self._wakeup.set()
+        if self._pid == os.getpid():
+            self.flush()
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'flushes': self.flushes,
+            }
+
+    def _ensure_worker(self):
+        # Threads do not survive fork(), so every worker process starts its
+        # own flusher and its own queue the first time it logs a request.
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_size)
+            self._wakeup = threading.Event()
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name='visitor-log-flusher', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.app.logger.error(f"Visitor log flusher error: {e}")
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        with self.app.app_context():
+            try:
+                self.db.session.execute(insert(self.model), batch)
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                with self._counter_lock:
+                    self.failed += len(batch)
+                self.app.logger.error(f"Visitor log flush error: {e}")
+                return 0
+        with self._counter_lock:
+            self.written += len(batch)
+            self.flushes += 1
+        return len(batch)
+
+    def _run_callbacks(self):
+        with self.app.app_context():
+            for callback in self._flush_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    self.db.session.rollback()
+                    self.app.logger.error(f"Visitor log flush callback error: {e}")
@@ -14,5 +14,6 @@ from dotenv import load_dotenv
 project_folder = os.path.expanduser(project_home)
 load_dotenv(os.path.join(project_folder, '.env'))
 
-# Import Flask app
-from app import app as application
+# Import Flask app (run 'flask init-db' once before the first start)
+from app import create_app
+application = create_app()